@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Command line interface for pyrofilegen.
+
+Usage:
+	python -m pyrofilegen serve --port 8080
+	python -m pyrofilegen generate --count 1000000 --seed 42 --output profiles.csv [--resume] [--sketch]
+	python -m pyrofilegen ingest ca/on/*.csv --province Ontario --output addresses.pfa
+"""
+
+import argparse
+import sys
+
+def serve(args):
+	"""
+	Function to run the local HTTP profile service.
+
+	Args:
+		args: Parsed command line arguments.
+
+	"""
+	from . import server
+	server.serve(host=args.host, port=args.port, buffer_size=args.buffer_size, variation=args.variation, phone_num_format=args.phone_num_format, verbose=args.verbose)
+	return 0
+
+def generate(args):
+	"""
+	Function to run a checkpointed bulk generation job.
+
+	Args:
+		args: Parsed command line arguments.
+
+	"""
+	from . import jobs
+	fields = [field for field in args.fields.split(",") if field] if args.fields else None
+	checkpoint = jobs.run_job(args.output, args.count, seed=args.seed, format=args.format, fields=fields, variation=args.variation, checkpoint_every=args.checkpoint_every, resume=args.resume, verify_full=args.verify_full, sketch=args.sketch)
+	print("Wrote %s rows (%s bytes) to %s" % (checkpoint["rows_written"], checkpoint["byte_offset"], args.output))
+	return 0
+
+def ingest(args):
+	"""
+	Function to ingest OpenAddresses extracts into an address store file.
+
+	Args:
+		args: Parsed command line arguments.
+
+	"""
+	from . import ingest
+	stats = ingest.ingest_files(args.inputs, args.output, province=args.province, processes=args.processes, chunk_size=args.chunk_size << 20)
+	print("Read %s records: %s invalid, %s duplicates, %s postal codes derived, %s dropped without a postal code" % (stats["read"], stats["invalid"], stats["duplicates"], stats["derived_postal_codes"], stats["dropped_no_postal_code"]))
+	print("Wrote %s addresses to %s" % (stats["written"], args.output))
+	return 0
+
+def main(argv=None):
+	"""
+	Function to run the pyrofilegen command line interface.
+
+	Args:
+		argv: List of command line arguments. (optional)
+
+	Returns:
+		The return value. Integer exit code.
+
+	"""
+	parser = argparse.ArgumentParser(prog="pyrofilegen", description="pyrofilegen is a python-based realistic Canadian data generator.")
+	commands = parser.add_subparsers(dest="command")
+
+	serve_parser = commands.add_parser("serve", help="Serve generated profiles over HTTP.")
+	serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind to.")
+	serve_parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+	serve_parser.add_argument("--buffer-size", type=int, default=1000, help="Number of pre-generated profiles to keep ready.")
+	serve_parser.add_argument("--variation", action="store_true", help="Generate profiles with variation.")
+	serve_parser.add_argument("--phone-num-format", type=int, default=5, help="See help(generate_phone_number).")
+	serve_parser.add_argument("--verbose", action="store_true", help="Log every request.")
+	serve_parser.set_defaults(function=serve)
+
+	generate_parser = commands.add_parser("generate", help="Generate profiles into a CSV/TSV file with checkpoints.")
+	generate_parser.add_argument("--output", required=True, help="Output file path.")
+	generate_parser.add_argument("--count", type=int, required=True, help="Number of profiles to generate.")
+	generate_parser.add_argument("--seed", type=int, default=0, help="Seed of the job.")
+	generate_parser.add_argument("--format", choices=["csv", "tsv"], default="csv", help="Output format.")
+	generate_parser.add_argument("--fields", help="Comma separated profile fields to write.")
+	generate_parser.add_argument("--variation", action="store_true", help="Generate profiles with variation.")
+	generate_parser.add_argument("--checkpoint-every", type=int, default=100000, help="Number of rows between checkpoints.")
+	generate_parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint.")
+	generate_parser.add_argument("--verify-full", action="store_true", help="Verify the checksum of the whole output before resuming.")
+	generate_parser.add_argument("--sketch", action="store_true", help="Write a data quality sketch report next to the output.")
+	generate_parser.set_defaults(function=generate)
+
+	ingest_parser = commands.add_parser("ingest", help="Ingest OpenAddresses CSV/GeoJSON files into an address store file.")
+	ingest_parser.add_argument("inputs", nargs="+", help="OpenAddresses CSV, line-delimited GeoJSON or GeoJSON FeatureCollection files.")
+	ingest_parser.add_argument("--output", required=True, help="Output address store path.")
+	ingest_parser.add_argument("--province", help="Province of records without a region.")
+	ingest_parser.add_argument("--processes", type=int, help="Number of parser processes, defaults to the number of CPUs.")
+	ingest_parser.add_argument("--chunk-size", type=int, default=64, help="Chunk size in MB.")
+	ingest_parser.set_defaults(function=ingest)
+
+	args = parser.parse_args(argv)
+	if not args.command:
+		parser.print_help()
+		return 2
+	return args.function(args)
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :addresses.py
+#description     :Synthetic address expansion for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module expands the real address table into a practically unlimited
+number of distinct, plausible addresses without materializing them.
+
+Every real street (street name, city, province) gets a range of street
+numbers around the numbers observed for it in the table. The ranges of all
+streets form one index space, which is shuffled by a seeded permutation.
+Address i is derived from (seed, i) alone:
+
+	-The street and a street number inside its range
+	-City, province and FSA of the nearest observed address on the street,
+	 with a new local delivery unit
+	-The lat-long of that address, slightly jittered
+	-A letter suffix (12A) once every street number has been used, and a
+	 unit number (Unit 3 - 12) once every suffix has, so addresses stay
+	 distinct for any index
+
+Memory use is proportional to the base table, regardless of how many
+addresses are derived.
+
+Usage:
+	>>expander = addresses.AddressExpander(seed=42)
+	>>pyrofilegen.generate_profile(row=expander[123456789])
+
+Attributes:
+	postal_letters (str): Letters that are used in Canadian postal codes.
+	street_number_suffixes (str): Letters appended to reused street numbers.
+"""
+
+import bisect
+from array import array
+
+from . import pyrofilegen
+from .permutation import IndexPermutation, hash_index
+
+postal_letters = "ABCEGHJKLMNPRSTVWXYZ"
+street_number_suffixes = "ABCDEFGH"
+
+class AddressExpander(object):
+	"""
+	Derives distinct synthetic address rows from the real address table.
+
+	Rows have the same layout as pyrofilegen.read_canadian_data(), so they
+	can be passed as the row argument of the address generators.
+
+	Args:
+		seed: Integer value used as the seed. (optional)
+		rows: Sequence of address rows to expand, defaults to
+			pyrofilegen.read_canadian_data(). (optional)
+		min_spread: Integer value containing the minimum number of street
+			numbers added on either side of the observed numbers. (optional)
+		jitter: Float value containing the maximum lat-long jitter in degrees. (optional)
+
+	"""
+
+	def __init__(self, seed=0, rows=None, min_spread=50, jitter=0.0015):
+		self.seed = seed
+		self.jitter = jitter
+		self.rows = rows if rows is not None else pyrofilegen.read_canadian_data()
+		streets = {}
+		for index, row in enumerate(self.rows):
+			if row[2].isdigit() and row[3]:
+				streets.setdefault((row[3], row[4], row[5]), []).append((int(row[2]), index))
+		if not streets:
+			raise ValueError("No address rows with a street number and name to expand")
+		self._starts = array("q")
+		self._first_numbers = array("q")
+		self._observed = []
+		capacity = 0
+		for key in sorted(streets):
+			observed = sorted(streets[key])
+			spread = max(min_spread, observed[-1][0] - observed[0][0])
+			first = max(1, observed[0][0] - spread)
+			last = observed[-1][0] + spread
+			self._starts.append(capacity)
+			self._first_numbers.append(first)
+			self._observed.append(observed)
+			capacity += last - first + 1
+		self.capacity = capacity
+		self._permutations = {}
+
+	def _permutation(self, cycle):
+		permutation = self._permutations.get(cycle)
+		if permutation is None:
+			if len(self._permutations) > 16:
+				self._permutations.clear()
+			permutation = self._permutations[cycle] = IndexPermutation(self.capacity, seed=hash_index(self.seed, cycle))
+		return permutation
+
+	def __getitem__(self, index):
+		return self.row(index)
+
+	def row(self, index):
+		"""
+		Function to derive the address row for an index.
+
+		Args:
+			index: Non-negative integer value containing the address index.
+
+		Returns:
+			The return value. List containing [latitude, longitude, street_num,
+			street_name, city, province, postal_code].
+
+		"""
+		if index < 0:
+			raise IndexError("address index must not be negative")
+		cycle, position = divmod(index, self.capacity)
+		position = self._permutation(cycle)[position]
+		street = bisect.bisect_right(self._starts, position) - 1
+		number = self._first_numbers[street] + position - self._starts[street]
+		observed = self._observed[street]
+		nearest = bisect.bisect_left(observed, (number, -1))
+		if nearest == len(observed) or (nearest > 0 and number - observed[nearest - 1][0] <= observed[nearest][0] - number):
+			nearest -= 1
+		source = self.rows[observed[nearest][1]]
+
+		bits = hash_index(self.seed ^ 0x5bd1e995, index)
+		latitude = float(source[0]) + ((bits & 0xFFFF) / 32767.5 - 1.0) * self.jitter
+		longitude = float(source[1]) + (((bits >> 16) & 0xFFFF) / 32767.5 - 1.0) * self.jitter
+		postal_code = source[6]
+		if len(postal_code) == 7:
+			postal_code = "%s %s%s%s" % (postal_code[:3], (bits >> 32) % 10, postal_letters[(bits >> 40) % len(postal_letters)], (bits >> 48) % 10)
+		if cycle == 0:
+			street_num = str(number)
+		elif cycle <= len(street_number_suffixes):
+			street_num = "%s%s" % (number, street_number_suffixes[cycle - 1])
+		else:
+			street_num = "Unit %s - %s" % (cycle - len(street_number_suffixes), number)
+		return ["%.7f" % latitude, "%.7f" % longitude, street_num, source[3], source[4], source[5], postal_code]
+
+	def rows_from(self, start=0, count=None):
+		"""
+		Function to lazily derive consecutive address rows.
+
+		Args:
+			start: Integer value containing the first address index. (optional)
+			count: Integer value containing the number of rows, unbounded if not given. (optional)
+
+		Returns:
+			The return value. Generator yielding address rows.
+
+		"""
+		index = start
+		while count is None or index < start + count:
+			yield self.row(index)
+			index += 1
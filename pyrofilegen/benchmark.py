@@ -0,0 +1,332 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :benchmark.py
+#description     :Throughput benchmark suite for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module measures the throughput of pyrofilegen so that performance
+changes can be tracked over time.
+
+Measurements include:
+	-Operations per second of each generate_* field function
+	-Profiles per second of generate_profile in every format
+	-Profiles per second in batch, streaming and parallel modes
+	-Import time of the package
+	-Peak resident set size of the benchmark process
+
+Every measurement is repeated several times and the fastest repeat is
+kept, as it is the one least disturbed by other load on the machine.
+Results are saved as JSON, and a previous results file can be passed with
+--compare to flag any measurement that got slower than the threshold.
+
+Usage:
+	python -m pyrofilegen.benchmark --output results.json
+	python -m pyrofilegen.benchmark --compare results.json --threshold 0.1
+
+Attributes:
+	field_benchmarks (list): List of (name, function) tuples used to
+		benchmark the individual field generators.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+from . import pyrofilegen
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+field_benchmarks = [
+	("generate_first_name", lambda: pyrofilegen.generate_first_name(variation=True)),
+	("generate_last_name", lambda: pyrofilegen.generate_last_name(variation=True)),
+	("generate_dob_year", pyrofilegen.generate_dob_year),
+	("generate_dob_month", pyrofilegen.generate_dob_month),
+	("generate_dob_day", pyrofilegen.generate_dob_day),
+	("generate_credit_card", pyrofilegen.generate_credit_card),
+	("generate_cvv", pyrofilegen.generate_cvv),
+	("generate_card_expiry", pyrofilegen.generate_card_expiry),
+	("generate_card_pin", pyrofilegen.generate_card_pin),
+	("generate_password", pyrofilegen.generate_password),
+	("generate_sin", pyrofilegen.generate_sin),
+	("generate_drivers_license", pyrofilegen.generate_drivers_license),
+	("generate_email", pyrofilegen.generate_email),
+	("generate_phone_number", pyrofilegen.generate_phone_number),
+	("generate_street_number", pyrofilegen.generate_street_number),
+	("generate_street_name", lambda: pyrofilegen.generate_street_name(variation=True)),
+	("generate_postal_code", lambda: pyrofilegen.generate_postal_code(variation=True)),
+	("generate_city", lambda: pyrofilegen.generate_city(variation=True)),
+	("generate_province", lambda: pyrofilegen.generate_province(variation=True)),
+	("generate_lat_long", pyrofilegen.generate_lat_long),
+	("generate_address_full", lambda: pyrofilegen.generate_address_full(variation=True)),
+	("generate_address_min", lambda: pyrofilegen.generate_address_min(variation=True)),
+	("generate_user_agent", pyrofilegen.generate_user_agent),
+	("generate_astrological_sign", lambda: pyrofilegen.generate_astrological_sign(variation=True)),
+	("generate_license_plate", pyrofilegen.generate_license_plate),
+	("generate_sentence", pyrofilegen.generate_sentence),
+	("generate_company", lambda: pyrofilegen.generate_company(variation=True)),
+	("generate_height", pyrofilegen.generate_height),
+	("generate_weight", pyrofilegen.generate_weight),
+]
+
+def time_operation(function, min_time=0.5, repeat=5):
+	"""
+	Function to measure how many times per second a function can be called.
+
+	The number of calls per round is doubled until a round takes at least
+	min_time / repeat seconds, so fast and slow functions both get stable
+	numbers. The round is then timed repeat times and the fastest is used.
+
+	Args:
+		function: Callable taking no arguments.
+		min_time: Float value containing the minimum seconds to measure. (optional)
+		repeat: Integer value containing the number of timed rounds. (optional)
+
+	Returns:
+		The return value. Float value containing operations per second.
+
+	"""
+	timer = timeit.Timer(function)
+	number = 1
+	while timer.timeit(number) < min_time / repeat:
+		number *= 2
+	return number / min(timer.repeat(repeat, number))
+
+def best_time(function, repeat=5):
+	"""
+	Function to get the fastest of several timed calls of a function.
+
+	Args:
+		function: Callable taking no arguments.
+		repeat: Integer value containing the number of timed calls. (optional)
+
+	Returns:
+		The return value. Float value containing the fastest call time in seconds.
+
+	"""
+	return min(timeit.Timer(function).repeat(repeat, 1))
+
+def _generate_chunk(count):
+	"""
+	Function used by the parallel benchmark worker processes.
+
+	Args:
+		count: Integer value containing the number of profiles to generate.
+
+	Returns:
+		The return value. Integer value containing the number of profiles generated.
+
+	"""
+	return len(pyrofilegen.generate_profiles(count, format=2))
+
+def benchmark_fields(min_time=0.5, repeat=5):
+	"""
+	Function to benchmark each individual field generator.
+
+	Args:
+		min_time: Float value containing the minimum seconds per measurement. (optional)
+		repeat: Integer value containing the number of timed rounds. (optional)
+
+	Returns:
+		The return value. Dict mapping benchmark name to operations per second.
+
+	"""
+	pyrofilegen.generate_first_name()
+	results = {}
+	for name, function in field_benchmarks:
+		results["field.%s" % name] = time_operation(function, min_time=min_time, repeat=repeat)
+	return results
+
+def benchmark_profiles(min_time=0.5, repeat=5):
+	"""
+	Function to benchmark generate_profile in every output format.
+
+	Args:
+		min_time: Float value containing the minimum seconds per measurement. (optional)
+		repeat: Integer value containing the number of timed rounds. (optional)
+
+	Returns:
+		The return value. Dict mapping benchmark name to profiles per second.
+
+	"""
+	results = {}
+	for format in (1, 2, 3):
+		for variation in (False, True):
+			name = "profile.format%s%s" % (format, ".variation" if variation else "")
+			results[name] = time_operation(lambda: pyrofilegen.generate_profile(format=format, variation=variation), min_time=min_time, repeat=repeat)
+	return results
+
+def benchmark_modes(sizes=(100, 1000), processes=None, repeat=5):
+	"""
+	Function to benchmark batch, streaming and parallel generation.
+
+	Args:
+		sizes: List of integer batch sizes to measure. (optional)
+		processes: Integer value containing the number of parallel worker
+			processes, defaults to the number of CPUs. (optional)
+		repeat: Integer value containing the number of timed runs per mode. (optional)
+
+	Returns:
+		The return value. Dict mapping benchmark name to profiles per second.
+
+	"""
+	results = {}
+	processes = processes or multiprocessing.cpu_count()
+	for size in sizes:
+		results["batch.%s" % size] = size / best_time(lambda: pyrofilegen.generate_profiles(size, format=2), repeat=repeat)
+		results["stream.%s" % size] = size / best_time(lambda: [profile for profile in pyrofilegen.stream_profiles(size, format=2)], repeat=repeat)
+
+		chunks = [size // processes + (1 if i < size % processes else 0) for i in range(processes)]
+		pool = multiprocessing.Pool(processes)
+		try:
+			pool.map(_generate_chunk, [1] * processes)
+			results["parallel%s.%s" % (processes, size)] = size / best_time(lambda: pool.map(_generate_chunk, [chunk for chunk in chunks if chunk]), repeat=repeat)
+		finally:
+			pool.close()
+			pool.join()
+	return results
+
+def benchmark_import_time(repeat=5):
+	"""
+	Function to measure the import time of the package in a fresh interpreter.
+
+	Args:
+		repeat: Integer value containing the number of imports to measure. (optional)
+
+	Returns:
+		The return value. Float value containing the best import time in seconds.
+
+	"""
+	code = "import time; start = time.perf_counter(); import pyrofilegen; print(time.perf_counter() - start)"
+	env = dict(os.environ)
+	env["PYTHONPATH"] = os.pathsep.join([path for path in sys.path if path])
+	timings = []
+	for _ in range(repeat):
+		output = subprocess.check_output([sys.executable, "-c", code], env=env)
+		timings.append(float(output.decode("utf-8").strip()))
+	return min(timings)
+
+def peak_rss():
+	"""
+	Function to get the peak resident set size of this process and its children.
+
+	Returns:
+		The return value. Integer value containing the peak RSS in kilobytes,
+		or None where the resource module is unavailable.
+
+	"""
+	if resource is None:
+		return None
+	scale = 1024 if sys.platform == "darwin" else 1
+	own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+	children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+	return max(own, children)
+
+def run_benchmarks(sizes=(100, 1000), min_time=0.5, processes=None, repeat=5):
+	"""
+	Function to run the full benchmark suite.
+
+	Args:
+		sizes: List of integer batch sizes to measure. (optional)
+		min_time: Float value containing the minimum seconds per measurement. (optional)
+		processes: Integer value containing the number of parallel worker processes. (optional)
+		repeat: Integer value containing the number of timed rounds per measurement. (optional)
+
+	Returns:
+		The return value. Dict containing the environment and results.
+
+	"""
+	results = {}
+	results.update(benchmark_fields(min_time=min_time, repeat=repeat))
+	results.update(benchmark_profiles(min_time=min_time, repeat=repeat))
+	results.update(benchmark_modes(sizes=sizes, processes=processes, repeat=repeat))
+	return {
+		"timestamp": datetime.datetime.now().isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"results": results,
+		"import_time": benchmark_import_time(repeat=repeat),
+		"peak_rss_kb": peak_rss(),
+	}
+
+def compare_results(baseline, current, threshold=0.1):
+	"""
+	Function to find the benchmarks that regressed against a baseline run.
+
+	Args:
+		baseline: Dict containing previous results from run_benchmarks().
+		current: Dict containing current results from run_benchmarks().
+		threshold: Float value containing the allowed relative slowdown. (optional)
+
+	Returns:
+		The return value. List of (name, baseline, current, change) tuples,
+		where change is the relative change in throughput or time.
+
+	"""
+	regressions = []
+	for name, value in sorted(current["results"].items()):
+		previous = baseline.get("results", {}).get(name)
+		if previous:
+			change = (value - previous) / previous
+			if change < -threshold:
+				regressions.append((name, previous, value, change))
+	previous = baseline.get("import_time")
+	if previous:
+		change = (current["import_time"] - previous) / previous
+		if change > threshold:
+			regressions.append(("import_time", previous, current["import_time"], change))
+	return regressions
+
+def main(argv=None):
+	"""
+	Function to run the benchmark suite from the command line.
+
+	Args:
+		argv: List of command line arguments. (optional)
+
+	Returns:
+		The return value. Integer exit code, 1 if a regression was found.
+
+	"""
+	parser = argparse.ArgumentParser(prog="python -m pyrofilegen.benchmark", description="Benchmark pyrofilegen throughput.")
+	parser.add_argument("--output", help="Path to save the JSON results to.")
+	parser.add_argument("--compare", help="Path of a previous JSON results file to compare against.")
+	parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative slowdown before flagging a regression.")
+	parser.add_argument("--sizes", default="100,1000", help="Comma separated batch sizes.")
+	parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds per measurement.")
+	parser.add_argument("--repeat", type=int, default=5, help="Number of timed rounds per measurement, the fastest is kept.")
+	parser.add_argument("--processes", type=int, help="Number of worker processes for the parallel benchmark.")
+	args = parser.parse_args(argv)
+
+	sizes = [int(size) for size in args.sizes.split(",") if size]
+	current = run_benchmarks(sizes=sizes, min_time=args.min_time, processes=args.processes, repeat=args.repeat)
+	for name, value in sorted(current["results"].items()):
+		print("%-45s %14.1f ops/sec" % (name, value))
+	print("%-45s %14.4f sec" % ("import_time", current["import_time"]))
+	print("%-45s %14s kB" % ("peak_rss", current["peak_rss_kb"]))
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(current, f, indent=2, sort_keys=True)
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		regressions = compare_results(baseline, current, threshold=args.threshold)
+		for name, previous, value, change in regressions:
+			print("REGRESSION %s: %.4g -> %.4g (%+.1f%%)" % (name, previous, value, change * 100))
+		if regressions:
+			return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
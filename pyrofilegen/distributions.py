@@ -0,0 +1,287 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :distributions.py
+#description     :Configurable demographic distributions for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module replaces the uniform ranges of the field generators with
+configurable population shapes, so bulk data can match real demographics.
+
+Every distribution is compiled once into an alias table, which draws a
+value in O(1) per sample. Once installed with pyrofilegen.set_demographics(), the
+following generators use it:
+
+	-generate_dob_year (age pyramid)
+	-generate_dob_day (every day of the month instead of 2-27)
+	-generate_first_name (gender ratio)
+	-generate_height and generate_weight (per gender)
+	-generate_email (email domain weights)
+	-generate_company (company weights)
+
+Usage:
+	>>from pyrofilegen import pyrofilegen, distributions
+	>>pyrofilegen.set_demographics(distributions.Demographics())
+	>>pyrofilegen.set_demographics(distributions.load_demographics('custom.json'))
+
+Attributes:
+	canadian_age_pyramid (dict): Bundled relative population of Canada per
+		five year age band, keyed by the first age of the band.
+	canadian_male_ratio (float): Bundled share of men in the adult population.
+	canadian_heights (dict): Bundled (mean, standard deviation) of height in
+		inches per gender.
+	canadian_weights (dict): Bundled (mean, standard deviation) of weight in
+		pounds per gender.
+	canadian_email_domains (dict): Bundled relative frequency of email domains.
+"""
+
+import calendar
+import datetime
+import json
+import math
+import random
+
+canadian_age_pyramid = {18: 1.5, 20: 2.5, 25: 2.7, 30: 2.8, 35: 2.7, 40: 2.5, 45: 2.4, 50: 2.5, 55: 2.7, 60: 2.6, 65: 2.2, 70: 1.8, 75: 1.2, 80: 0.8, 85: 0.6}
+canadian_male_ratio = 0.495
+canadian_heights = {"male": (69.3, 2.9), "female": (64.0, 2.7)}
+canadian_weights = {"male": (196.0, 34.0), "female": (160.0, 35.0)}
+canadian_email_domains = {"gmail.com": 45, "hotmail.com": 20, "yahoo.com": 10, "outlook.com": 8, "icloud.com": 6, "live.ca": 3, "shaw.ca": 3, "rogers.com": 3, "sympatico.ca": 2}
+
+class AliasTable(object):
+	"""
+	Discrete distribution sampled in O(1) with Vose's alias method.
+
+	Args:
+		weights: List of non-negative weights, or dict mapping value to weight.
+		values: List of values matching the weights, defaults to their indices. (optional)
+
+	"""
+
+	def __init__(self, weights, values=None):
+		if isinstance(weights, dict):
+			values = list(weights.keys())
+			weights = list(weights.values())
+		count = len(weights)
+		total = float(sum(weights))
+		if count == 0 or total <= 0:
+			raise ValueError("An alias table needs at least one positive weight")
+		self.values = list(values) if values is not None else list(range(count))
+		scaled = [weight * count / total for weight in weights]
+		self.probabilities = [1.0] * count
+		self.aliases = list(range(count))
+		small = [i for i, weight in enumerate(scaled) if weight < 1.0]
+		large = [i for i, weight in enumerate(scaled) if weight >= 1.0]
+		while small and large:
+			less = small.pop()
+			more = large.pop()
+			self.probabilities[less] = scaled[less]
+			self.aliases[less] = more
+			scaled[more] = scaled[more] + scaled[less] - 1.0
+			if scaled[more] < 1.0:
+				small.append(more)
+			else:
+				large.append(more)
+
+	def __len__(self):
+		return len(self.values)
+
+	def draw(self):
+		"""
+		Function to draw a single value.
+
+		Returns:
+			The return value. One of the table values.
+
+		"""
+		u = random.random() * len(self.values)
+		column = int(u)
+		if u - column < self.probabilities[column]:
+			return self.values[column]
+		return self.values[self.aliases[column]]
+
+def _normal_weights(mean, deviation, low, high):
+	"""
+	Function to discretize a normal distribution over the integers low..high.
+
+	"""
+	return dict((value, math.exp(-0.5 * ((value - mean) / deviation) ** 2)) for value in range(low, high + 1))
+
+class Demographics(object):
+	"""
+	Compiled set of demographic distributions used by the generators.
+
+	Every argument defaults to the bundled Canadian distribution.
+
+	Args:
+		age_pyramid: Dict mapping the first age of an age band to its relative
+			population; a band ends where the next one starts. (optional)
+		male_ratio: Float value containing the share of men. (optional)
+		heights: Dict mapping "male"/"female" to (mean, standard deviation)
+			in inches, or to a dict of inches to weight. (optional)
+		weights: Dict mapping "male"/"female" to (mean, standard deviation)
+			in pounds, or to a dict of pounds to weight. (optional)
+		email_domains: Dict mapping email domain to relative frequency. (optional)
+		company_weights: Dict mapping company name to relative frequency,
+			companies not listed have weight 1. Uniform if not given. (optional)
+		reference_year: Integer value containing the year ages are relative to,
+			defaults to the current year. (optional)
+
+	"""
+
+	def __init__(self, age_pyramid=None, male_ratio=None, heights=None, weights=None, email_domains=None, company_weights=None, reference_year=None):
+		reference_year = reference_year or datetime.date.today().year
+		age_pyramid = age_pyramid or canadian_age_pyramid
+		ages = sorted(int(age) for age in age_pyramid)
+		band_weights = dict((int(age), weight) for age, weight in age_pyramid.items())
+		year_weights = {}
+		for i, age in enumerate(ages):
+			end = ages[i + 1] if i + 1 < len(ages) else age + 5
+			for band_age in range(age, end):
+				year_weights[reference_year - band_age] = band_weights[age] / float(end - age)
+		self.dob_years = AliasTable(year_weights)
+
+		male_ratio = canadian_male_ratio if male_ratio is None else male_ratio
+		self.genders = AliasTable([male_ratio, 1.0 - male_ratio], ["Male", "Female"])
+
+		self.heights = {}
+		for gender, distribution in (heights or canadian_heights).items():
+			if not isinstance(distribution, dict):
+				distribution = _normal_weights(distribution[0], distribution[1], 54, 84)
+			self.heights[gender.lower()] = AliasTable(distribution)
+
+		self.weights = {}
+		for gender, distribution in (weights or canadian_weights).items():
+			if not isinstance(distribution, dict):
+				distribution = _normal_weights(distribution[0], distribution[1], 90, 350)
+			self.weights[gender.lower()] = AliasTable(distribution)
+
+		self.email_domains = AliasTable(email_domains or canadian_email_domains)
+		self.company_weights = company_weights
+		self._companies = None
+		self._company_table = None
+
+	def dob_year(self):
+		"""
+		Function to draw a year of birth.
+
+		Returns:
+			The return value. Integer value containing the year.
+
+		"""
+		return self.dob_years.draw()
+
+	def dob_day(self, dob_year, dob_month):
+		"""
+		Function to draw a day of birth within the real length of the month.
+
+		Args:
+			dob_year: Integer/String value containing the year of birth.
+			dob_month: Integer/String value containing the month of birth.
+
+		Returns:
+			The return value. Integer value containing the day.
+
+		"""
+		return random.randint(1, calendar.monthrange(int(dob_year), int(dob_month))[1])
+
+	def gender(self):
+		"""
+		Function to draw a gender.
+
+		Returns:
+			The return value. String value, either "Male" or "Female".
+
+		"""
+		return self.genders.draw()
+
+	def height(self, gender):
+		"""
+		Function to draw a height in inches for a gender.
+
+		Returns:
+			The return value. Integer value containing the height in inches.
+
+		"""
+		return self.heights[gender.lower()].draw()
+
+	def weight(self, gender):
+		"""
+		Function to draw a weight in pounds for a gender.
+
+		Returns:
+			The return value. Integer value containing the weight in pounds.
+
+		"""
+		return self.weights[gender.lower()].draw()
+
+	def email_domain(self):
+		"""
+		Function to draw an email domain.
+
+		Returns:
+			The return value. String value containing the domain.
+
+		"""
+		return self.email_domains.draw()
+
+	def set_companies(self, companies):
+		"""
+		Function to set the company list drawn from and build its alias table.
+
+		Args:
+			companies: Sequence of company names.
+
+		"""
+		if self.company_weights:
+			table_weights = [self.company_weights.get(company, 1) for company in companies]
+		else:
+			table_weights = [1] * len(companies)
+		self._company_table = AliasTable(table_weights)
+		self._companies = companies
+
+	def company(self, companies=None):
+		"""
+		Function to draw a company from the company list.
+
+		pyrofilegen.set_demographics() and install_assets() set the list, see
+		help(set_companies), so its alias table is built once, not per draw.
+
+		Args:
+			companies: Sequence of company names, replacing the current list if
+				it is a different object. (optional)
+
+		Returns:
+			The return value. String value containing the company.
+
+		"""
+		if companies is not None and companies is not self._companies:
+			self.set_companies(companies)
+		if self._company_table is None:
+			raise ValueError("No company list is set, see help(Demographics.set_companies)")
+		return self._companies[self._company_table.draw()]
+
+def load_demographics(path):
+	"""
+	Function to load demographics from a JSON file.
+
+	The file contains an object with any of the Demographics arguments.
+
+	Args:
+		path: String value containing the JSON file path.
+
+	Returns:
+		The return value. Demographics.
+
+	"""
+	with open(path) as f:
+		config = json.load(f)
+	for key in ("age_pyramid",):
+		if key in config:
+			config[key] = dict((int(age), weight) for age, weight in config[key].items())
+	for key in ("heights", "weights"):
+		for gender, distribution in config.get(key, {}).items():
+			if isinstance(distribution, dict):
+				config[key][gender] = dict((int(value), weight) for value, weight in distribution.items())
+	return Demographics(**config)
@@ -0,0 +1,206 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :encoders.py
+#description     :Fast CSV, TSV and text output for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module writes profiles as CSV, TSV or the generate_profile(format=1)
+text layout without formatting or encoding every row as a whole.
+
+Rows are formatted as text with a template precompiled for the fields and
+format, and every batch is encoded with one call into a reusable
+bytearray that is written out in large blocks; only batches with values
+that need quoting are escaped field by field. The output is byte for byte the same as that of
+csv.writer (lineterminator "\\n") and of format_profile().
+
+Usage:
+	>>with open('profiles.csv', 'wb') as f:
+	>>    encoders.write_profiles(pyrofilegen.stream_profiles(1000000, format=3), f, format='csv')
+
+Attributes:
+	delimiters (dict): Dict mapping each delimited format to its delimiter.
+	quoted_fields (dict): Dict mapping each delimited format to the fields
+		whose values contain the delimiter and so are always quoted.
+	text_layout (list): List of (label, field) tuples of the text layout,
+		see pyrofilegen.profile_text_layout.
+"""
+
+import operator
+
+from . import pyrofilegen
+
+delimiters = {"csv": ",", "tsv": "\t"}
+quoted_fields = {"csv": ["lat_long"], "tsv": []}
+text_layout = pyrofilegen.profile_text_layout
+
+class ProfileEncoder(object):
+	"""
+	Encoder of profiles into CSV, TSV or text layout bytes.
+
+	Args:
+		format: String value, either "csv", "tsv" or "text". (optional)
+		fields: List of field keys, defaults to every profile field. Ignored
+			by the text layout. (optional)
+
+	"""
+
+	def __init__(self, format="csv", fields=None):
+		if format != "text" and format not in delimiters:
+			raise ValueError("Unknown output format: %s" % format)
+		self.format = format
+		if format == "text":
+			self.fields = [field for label, field in text_layout]
+			self._template = pyrofilegen.profile_text_template + "\n\n"
+		else:
+			self.fields = list(fields or pyrofilegen.profile_fields)
+			for field in self.fields:
+				if field not in pyrofilegen.profile_fields:
+					raise ValueError("Unknown profile field: %s" % field)
+			self.delimiter = delimiters[format]
+			self._quoted = [i for i, field in enumerate(self.fields) if field in quoted_fields[format]]
+			self._row_template = self.delimiter.join(['"%s"' if field in quoted_fields[format] else "%s" for field in self.fields])
+		self._positions = [pyrofilegen.profile_fields.index(field) for field in self.fields]
+		self._dict_getter = operator.itemgetter(*self.fields)
+		self._list_getter = operator.itemgetter(*self._positions)
+		if len(self.fields) == 1:
+			self._dict_getter = _single(self._dict_getter)
+			self._list_getter = _single(self._list_getter)
+
+	def _values(self, profile):
+		"""
+		Function to get the values of the encoded fields from a profile.
+
+		"""
+		try:
+			if isinstance(profile, dict):
+				return self._dict_getter(profile)
+			return self._list_getter(profile)
+		except (KeyError, IndexError):
+			if isinstance(profile, dict):
+				return tuple([profile.get(field) for field in self.fields])
+			return tuple([profile[i] if i < len(profile) else None for i in self._positions])
+
+	def _escape_row(self, values):
+		"""
+		Function to encode a row value by value, quoting where needed.
+
+		"""
+		cells = []
+		for value in values:
+			value = "" if value is None else str(value)
+			if self.delimiter in value or '"' in value or "\n" in value or "\r" in value:
+				value = '"%s"' % value.replace('"', '""')
+			cells.append(value)
+		if len(cells) == 1 and not cells[0]:
+			return '""'
+		return self.delimiter.join(cells)
+
+	def header(self):
+		"""
+		Function to encode the header row.
+
+		Returns:
+			The return value. Bytes containing the header row, empty for the text layout.
+
+		"""
+		if self.format == "text":
+			return b""
+		return (self._escape_row(self.fields) + "\n").encode("utf-8")
+
+	def encode(self, profiles, buffer):
+		"""
+		Function to append encoded profiles to a buffer.
+
+		The whole batch is formatted as text and encoded at once. Rows with a
+		field that needs unexpected quoting or is missing or None are encoded
+		again field by field.
+
+		Args:
+			profiles: Iterable of dict or list profiles.
+			buffer: bytearray the encoded rows are appended to.
+
+		Returns:
+			The return value. Integer value containing the number of profiles encoded.
+
+		"""
+		profiles = profiles if isinstance(profiles, list) else list(profiles)
+		if not profiles:
+			return 0
+		count = len(profiles)
+		getter = self._dict_getter if isinstance(profiles[0], dict) else self._list_getter
+		block = None
+		if self.format == "text":
+			template = self._template
+			try:
+				block = "".join([template % getter(profile) for profile in profiles])
+			except (KeyError, IndexError, TypeError):
+				block = "".join([template % self._values(profile) for profile in profiles])
+		else:
+			delimiter = self.delimiter
+			separators = len(self.fields) - 1 + len(self._quoted)
+			quotes = 2 * len(self._quoted)
+			try:
+				rows = [getter(profile) for profile in profiles]
+				lines = [self._row_template % row for row in rows]
+				for i in self._quoted:
+					if not all([delimiter in row[i] for row in rows]):
+						raise TypeError("Quoted field without a delimiter")
+			except (KeyError, IndexError, TypeError):
+				lines = [self._escape_row(self._values(profile)) for profile in profiles]
+			else:
+				block = "\n".join(lines) + "\n"
+				if block.count(delimiter) != count * separators or block.count('"') != count * quotes or block.count("\n") != count or "\r" in block or "None" in block or not all(lines):
+					block = None
+					for i, line in enumerate(lines):
+						if line.count(delimiter) != separators or line.count('"') != quotes or "\n" in line or "\r" in line or "None" in line or not line:
+							lines[i] = self._escape_row(rows[i])
+			if block is None:
+				block = "\n".join(lines) + "\n"
+		buffer += block.encode("utf-8")
+		return count
+
+def _single(getter):
+	"""
+	Function to make a single field itemgetter return a tuple.
+
+	"""
+	return lambda profile: (getter(profile),)
+
+def write_profiles(profiles, stream, format="csv", fields=None, header=True, block_size=1 << 20):
+	"""
+	Function to write profiles to a binary stream as CSV, TSV or text.
+
+	Text layout profiles are the format_profile(format=1) text followed by
+	a blank line.
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		stream: Binary file-like object with a write() method.
+		format: String value, either "csv", "tsv" or "text". (optional)
+		fields: List of field keys, defaults to every profile field. (optional)
+		header: Boolean value indicating whether the header row is written. (optional)
+		block_size: Integer value containing the number of bytes buffered between writes. (optional)
+
+	Returns:
+		The return value. Integer value containing the number of profiles written.
+
+	"""
+	encoder = ProfileEncoder(format, fields)
+	buffer = bytearray(encoder.header() if header else b"")
+	count = 0
+	batch = []
+	for profile in profiles:
+		batch.append(profile)
+		if len(batch) == 1000:
+			count += encoder.encode(batch, buffer)
+			batch = []
+			if len(buffer) >= block_size:
+				stream.write(buffer)
+				del buffer[:]
+	count += encoder.encode(batch, buffer)
+	if buffer:
+		stream.write(buffer)
+	return count
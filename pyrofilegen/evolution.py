@@ -0,0 +1,247 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :evolution.py
+#description     :Incremental population evolution with change data capture deltas.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module simulates a population of profiles that changes over time and
+emits only the insert, update and delete records of every time step, for
+testing change data capture and sync pipelines.
+
+No profiles are stored. Each entity is identified by its index, its base
+profile is derived from (seed, index), and the only per-entity state is
+whether it is alive, its position in the list of living entities and a
+version counter per group of changing fields:
+
+	-move: a new address, phone number, driver's license and license plate
+	-card: a replaced credit card (number, expiry, CVV, PIN)
+	-email: a new email address
+
+The values of a group at a version are derived from (seed, index, group,
+version), so memory is 15 bytes per entity and the work per time step is
+proportional to the number of changes. An update derives only the fields
+of the changed group and the name and date of birth they depend on.
+
+Usage:
+	>>evolver = evolution.PopulationEvolver(50000000, seed=42, change_rate=0.001)
+	>>for record in evolver.snapshot(): ...
+	>>for tick in range(180):
+	>>    for record in evolver.step(): ...
+
+Attributes:
+	change_groups (dict): Dict mapping each change group to the profile fields it updates.
+"""
+
+import random
+from array import array
+
+from . import pyrofilegen
+from .permutation import hash_index
+
+change_groups = {
+	"move": ["street_num", "street_name", "city", "province", "postal_code", "lat_long", "phone_num", "drivers_license", "license_plate"],
+	"card": ["credit_card", "credit_card_expiry", "credit_card_cvv", "credit_card_pin"],
+	"email": ["email"],
+}
+_group_salts = {"move": 1, "card": 2, "email": 3}
+
+class PopulationEvolver(object):
+	"""
+	Evolving population of profiles emitting change data capture deltas.
+
+	The asset tables are loaded into memory first, see load_assets(); tables
+	that are already installed are kept.
+
+	Args:
+		size: Integer value containing the initial number of entities.
+		seed: Integer value used as the seed. (optional)
+		change_rate: Float value containing the share of living entities
+			changed per time step. (optional)
+		change_weights: Dict mapping "move", "card", "email" and "delete" to
+			the relative frequency of each kind of change. (optional)
+		signup_rate: Float value containing the number of new entities per
+			time step, relative to the living population. (optional)
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		card_expiry_format: See help(generate_card_expiry).
+
+	"""
+
+	def __init__(self, size, seed=0, change_rate=0.01, change_weights=None, signup_rate=0.001, variation=False, phone_num_format=5, card_expiry_format="mm/yy"):
+		pyrofilegen.load_assets(replace=False)
+		self.seed = seed
+		self.change_rate = change_rate
+		self.signup_rate = signup_rate
+		self.variation = variation
+		self.phone_num_format = phone_num_format
+		self.card_expiry_format = card_expiry_format
+		change_weights = change_weights or {"move": 4, "card": 3, "email": 2, "delete": 1}
+		self._change_kinds = sorted(change_weights)
+		self._change_weights = [change_weights[kind] for kind in self._change_kinds]
+		self.tick = 0
+		self.alive = bytearray(b"\x01") * size
+		self.alive_count = size
+		self._living = array("I", range(size))
+		self._living_positions = array("I", range(size))
+		self.versions = dict((group, array("H", bytes(2 * size))) for group in change_groups)
+
+	def __len__(self):
+		return len(self.alive)
+
+	def _base_profile(self, entity):
+		"""
+		Function to derive the base profile of an entity.
+
+		"""
+		with pyrofilegen.seeded(hash_index(self.seed, entity)):
+			return pyrofilegen.generate_profile(format=3, variation=self.variation, phone_num_format=self.phone_num_format, card_expiry_format=self.card_expiry_format)
+
+	def _identity(self, entity):
+		"""
+		Function to derive the name and date of birth of an entity.
+
+		The draws of generate_profile() are repeated up to the date of birth,
+		so the values match the base profile without generating all of it.
+
+		"""
+		with pyrofilegen.seeded(hash_index(self.seed, entity)):
+			chance = random.randint(1, 100)
+			random.choice(pyrofilegen.read_canadian_data())
+			first_name = pyrofilegen.generate_first_name(chance=chance, variation=self.variation)
+			last_name = pyrofilegen.generate_last_name(variation=self.variation)
+			pyrofilegen.generate_last_name(variation=self.variation)
+			dob_year = pyrofilegen.generate_dob_year()
+			dob_month = pyrofilegen.generate_dob_month()
+			dob_day = pyrofilegen.generate_dob_day(dob_year=dob_year, dob_month=dob_month)
+		return {"first_name": first_name, "last_name": last_name, "dob_year": dob_year, "dob_month": dob_month, "dob_day": dob_day}
+
+	def _group_values(self, entity, profile, group, version):
+		"""
+		Function to derive the values of a change group at a version.
+
+		Args:
+			entity: Integer value containing the entity index.
+			profile: Dict containing at least the name and date of birth of
+				the entity, which the values depend on.
+			group: String value containing the change group.
+			version: Integer value containing the group version.
+
+		Returns:
+			The return value. Dict mapping the group fields to their values.
+
+		"""
+		entity_seed = hash_index(self.seed, entity)
+		with pyrofilegen.seeded(hash_index(hash_index(entity_seed, _group_salts[group]), version)):
+			if group == "move":
+				row = random.choice(pyrofilegen.read_canadian_data())
+				address = pyrofilegen.generate_address_full(format=2, variation=self.variation, row=row)
+				province = address[3]
+				return {
+					"street_num": address[0], "street_name": address[1], "city": address[2], "province": province, "postal_code": address[4],
+					"lat_long": pyrofilegen.generate_lat_long(row=row),
+					"phone_num": str(pyrofilegen.generate_phone_number(location=[address[2], province], format=self.phone_num_format)),
+					"drivers_license": str(pyrofilegen.generate_drivers_license(province=province, first_name=profile["first_name"], last_name=profile["last_name"], dob_year=profile["dob_year"], dob_month=profile["dob_month"], dob_day=profile["dob_day"])),
+					"license_plate": str(pyrofilegen.generate_license_plate(province=province)),
+				}
+			elif group == "card":
+				return {
+					"credit_card": pyrofilegen.generate_credit_card(),
+					"credit_card_expiry": pyrofilegen.generate_card_expiry(format=self.card_expiry_format),
+					"credit_card_cvv": pyrofilegen.generate_cvv(),
+					"credit_card_pin": pyrofilegen.generate_card_pin(),
+				}
+			elif group == "email":
+				return {"email": pyrofilegen.generate_email(first_name=profile["first_name"], last_name=profile["last_name"], dob_year=profile["dob_year"], dob_month=profile["dob_month"], dob_day=profile["dob_day"])}
+
+	def _remove_living(self, entity):
+		"""
+		Function to mark an entity as deleted.
+
+		The last living entity is moved into its place in the list of living
+		entities, so deletes and random picks stay O(1).
+
+		"""
+		position = self._living_positions[entity]
+		last = self._living.pop()
+		if last != entity:
+			self._living[position] = last
+			self._living_positions[last] = position
+		self.alive[entity] = 0
+		self.alive_count -= 1
+
+	def profile(self, entity):
+		"""
+		Function to derive the current profile of an entity.
+
+		Args:
+			entity: Integer value containing the entity index.
+
+		Returns:
+			The return value. Dict profile with an added "entity_id" key.
+
+		"""
+		profile = self._base_profile(entity)
+		profile["entity_id"] = entity
+		for group in change_groups:
+			version = self.versions[group][entity]
+			if version:
+				profile.update(self._group_values(entity, profile, group, version))
+		return profile
+
+	def snapshot(self):
+		"""
+		Function to emit an insert record for every living entity.
+
+		Returns:
+			The return value. Generator yielding insert records.
+
+		"""
+		for entity in range(len(self.alive)):
+			if self.alive[entity]:
+				yield {"tick": self.tick, "op": "insert", "entity_id": entity, "values": self.profile(entity)}
+
+	def step(self):
+		"""
+		Function to advance the population by one time step.
+
+		The whole step is applied before it returns, so the population state
+		does not depend on how far the records are read.
+
+		Returns:
+			The return value. List of the insert, update and delete records of
+			the time step, each a dict with "tick", "op", "entity_id" and
+			"values" (updates also name the "change").
+
+		"""
+		self.tick += 1
+		tick_random = random.Random(hash_index(self.seed ^ 0x7f4a7c15, self.tick))
+		changes = int(self.alive_count * self.change_rate + tick_random.random())
+		signups = int(self.alive_count * self.signup_rate + tick_random.random())
+		records = []
+		for _ in range(changes):
+			if not self.alive_count:
+				break
+			entity = self._living[tick_random.randrange(self.alive_count)]
+			kind = tick_random.choices(self._change_kinds, self._change_weights)[0]
+			if kind == "delete":
+				self._remove_living(entity)
+				records.append({"tick": self.tick, "op": "delete", "entity_id": entity, "values": None})
+				continue
+			versions = self.versions[kind]
+			versions[entity] = (versions[entity] % 65535) + 1
+			identity = self._identity(entity) if kind != "card" else None
+			values = self._group_values(entity, identity, kind, versions[entity])
+			records.append({"tick": self.tick, "op": "update", "entity_id": entity, "change": kind, "values": values})
+		for _ in range(signups):
+			entity = len(self.alive)
+			self.alive.append(1)
+			self.alive_count += 1
+			self._living_positions.append(len(self._living))
+			self._living.append(entity)
+			for versions in self.versions.values():
+				versions.append(0)
+			records.append({"tick": self.tick, "op": "insert", "entity_id": entity, "values": self.profile(entity)})
+		return records
@@ -0,0 +1,488 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :ingest.py
+#description     :OpenAddresses ingest into the pyrofilegen address store.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module turns OpenAddresses extracts (CSV, line-delimited GeoJSON or
+a GeoJSON FeatureCollection) into the memory mappable asset store read by
+shared_assets.open_asset_file(), so the generators can sample from
+millions of real addresses.
+
+Every input file is split into line aligned byte ranges that are parsed
+and normalized in parallel by a process pool, with a bounded number of
+chunks in flight. A FeatureCollection is read whole, as one chunk. The
+parent process spreads the rows over shard files by the hash of their
+address, then deduplicates and writes one shard at a time, so memory use
+does not grow with the size of the input:
+
+	-Whitespace is collapsed and all upper/lower case names are title cased
+	-Region abbreviations are mapped to province names, falling back to the
+	 default province and then to the first letter of the postal code
+	-Rows with the same number, street, city and province are written once
+	-Missing postal codes are derived from the data itself: the postal code
+	 whose addresses are centred nearest, within about a kilometre, or else the most common
+	 postal code of the city. Rows where neither exists are dropped.
+
+Usage:
+	python -m pyrofilegen ingest ca/on/*.csv --province Ontario --output addresses.pfa
+	>>shared_assets.open_asset_file('addresses.pfa')
+
+Attributes:
+	province_abbreviations (dict): Dict mapping province abbreviations to province names.
+	postal_provinces (dict): Dict mapping the first letter of postal codes to province names.
+	grid_size (float): Float value containing the size in degrees of the postal code grid cells.
+"""
+
+import collections
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+
+from .shared_assets import TableFileWriter
+
+province_abbreviations = {
+	"AB": "Alberta", "BC": "British Columbia", "MB": "Manitoba", "NB": "New Brunswick", "NL": "Newfoundland and Labrador",
+	"NS": "Nova Scotia", "NT": "Northwest Territories", "NU": "Nunavut", "ON": "Ontario", "PE": "Prince Edward Island",
+	"QC": "Quebec", "SK": "Saskatchewan", "YT": "Yukon",
+}
+postal_provinces = {
+	"A": "Newfoundland and Labrador", "B": "Nova Scotia", "C": "Prince Edward Island", "E": "New Brunswick",
+	"G": "Quebec", "H": "Quebec", "J": "Quebec", "K": "Ontario", "L": "Ontario", "M": "Ontario", "N": "Ontario", "P": "Ontario",
+	"R": "Manitoba", "S": "Saskatchewan", "T": "Alberta", "V": "British Columbia", "X": "Northwest Territories", "Y": "Yukon",
+}
+grid_size = 0.01
+_province_names = dict((name.lower(), name) for name in province_abbreviations.values())
+_province_names.update({"québec": "Quebec", "yukon territory": "Yukon", "pei": "Prince Edward Island", "nfld": "Newfoundland and Labrador"})
+_postal_pattern = re.compile(r"^[A-Z][0-9][A-Z][0-9][A-Z][0-9]$")
+_upper_words = set(["NE", "NW", "SE", "SW", "N", "S", "E", "W", "II", "III", "IV"])
+
+def normalize_name(value):
+	"""
+	Function to normalize a street or city name.
+
+	Args:
+		value: String value containing the name.
+
+	Returns:
+		The return value. String value with collapsed whitespace, title cased
+		if the source was all upper or lower case.
+
+	"""
+	value = " ".join(value.split())
+	if value.isupper() or value.islower():
+		words = []
+		for word in value.split(" "):
+			if word.upper() in _upper_words:
+				words.append(word.upper())
+			else:
+				words.append("-".join(part[:1].upper() + part[1:].lower() for part in word.split("-")))
+		value = " ".join(words)
+	return value
+
+def normalize_postal_code(value):
+	"""
+	Function to normalize a postal code to the "A1A 1A1" form.
+
+	Args:
+		value: String value containing the postal code.
+
+	Returns:
+		The return value. String value containing the postal code, empty if invalid.
+
+	"""
+	value = "".join(value.split()).upper()
+	if _postal_pattern.match(value):
+		return "%s %s" % (value[:3], value[3:])
+	return ""
+
+def normalize_province(region, postal_code="", default=None):
+	"""
+	Function to map a region to a province name.
+
+	Args:
+		region: String value containing the region, name or abbreviation.
+		postal_code: String value containing the normalized postal code. (optional)
+		default: String value containing the province used if the region is empty. (optional)
+
+	Returns:
+		The return value. String value containing the province name, empty if unknown.
+
+	"""
+	region = " ".join(region.split())
+	if region:
+		if region.upper() in province_abbreviations:
+			return province_abbreviations[region.upper()]
+		return _province_names.get(region.lower(), normalize_name(region))
+	if default:
+		return normalize_province(default)
+	if postal_code:
+		return postal_provinces.get(postal_code[0], "")
+	return ""
+
+def normalize_record(record, province=None):
+	"""
+	Function to normalize an OpenAddresses record into an address row.
+
+	Args:
+		record: Dict mapping the upper case OpenAddresses columns to values.
+		province: String value containing the default province. (optional)
+
+	Returns:
+		The return value. List containing [latitude, longitude, street_num,
+		street_name, city, province, postal_code], or None if the record
+		lacks coordinates, a number, a street or a city.
+
+	"""
+	try:
+		latitude = float(record.get("LAT") or "")
+		longitude = float(record.get("LON") or "")
+	except ValueError:
+		return None
+	street_num = "".join((record.get("NUMBER") or "").split())
+	street_name = normalize_name(record.get("STREET") or "")
+	city = normalize_name(record.get("CITY") or "") or normalize_name(record.get("DISTRICT") or "")
+	if not (street_num and street_name and city) or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+		return None
+	postal_code = normalize_postal_code(record.get("POSTCODE") or "")
+	return ["%.7f" % latitude, "%.7f" % longitude, street_num, street_name, city, normalize_province(record.get("REGION") or "", postal_code, province), postal_code]
+
+def _geojson_record(line):
+	"""
+	Function to convert a GeoJSON feature line into an OpenAddresses record.
+
+	Returns None for lines that are not features, see help(_feature_record).
+
+	"""
+	line = line.strip().rstrip(",")
+	if not line.startswith("{"):
+		return None
+	try:
+		feature = json.loads(line)
+	except ValueError:
+		return None
+	return _feature_record(feature)
+
+def _feature_record(feature):
+	"""
+	Function to convert a GeoJSON feature into an OpenAddresses record.
+
+	Returns None for objects that are not Point features, and an empty
+	record, which is counted as invalid, for Point features without two
+	coordinates.
+
+	"""
+	if not isinstance(feature, dict):
+		return None
+	geometry = feature.get("geometry") or {}
+	if feature.get("type") != "Feature" or geometry.get("type") != "Point":
+		return None
+	coordinates = geometry.get("coordinates")
+	if not isinstance(coordinates, list) or len(coordinates) < 2:
+		return {}
+	record = dict((key.upper(), value if isinstance(value, str) else ("" if value is None else str(value))) for key, value in (feature.get("properties") or {}).items())
+	record["LON"], record["LAT"] = [str(value) for value in coordinates[:2]]
+	return record
+
+def file_chunks(path, chunk_size=64 << 20):
+	"""
+	Function to split an input file into byte ranges for parallel parsing.
+
+	Args:
+		path: String value containing the CSV or GeoJSON file path.
+		chunk_size: Integer value containing the approximate chunk size in bytes. (optional)
+
+	Returns:
+		The return value. List of (path, kind, start, end, header) tuples,
+		where kind is "csv", "geojson" or "featurecollection" and header the
+		CSV column names.
+
+	"""
+	size = os.path.getsize(path)
+	with open(path, "rb") as f:
+		first_line = f.readline()
+		start = 0
+		header = None
+		if first_line.lstrip().startswith(b"{"):
+			kind = "geojson"
+			if b'"FeatureCollection"' in first_line:
+				kind = "featurecollection"
+			else:
+				try:
+					json.loads(first_line.decode("utf-8-sig").strip().rstrip(","))
+				except ValueError:
+					kind = "featurecollection"
+			if kind == "featurecollection":
+				return [(path, kind, 0, size, None)]
+		else:
+			kind = "csv"
+			header = [column.strip().upper() for column in next(csv.reader([first_line.decode("utf-8-sig")]))]
+			missing = [column for column in ("LON", "LAT", "NUMBER", "STREET") if column not in header]
+			if missing:
+				raise ValueError("%s is missing the OpenAddresses columns %s" % (path, ", ".join(missing)))
+			start = f.tell()
+	chunks = []
+	while start < size:
+		end = min(size, start + chunk_size)
+		chunks.append((path, kind, start, end, header))
+		start = end
+	return chunks
+
+def _chunk_lines(path, start, end):
+	"""
+	Function to yield the lines starting inside a byte range.
+
+	"""
+	with open(path, "rb") as f:
+		if start:
+			f.seek(start - 1)
+			f.readline()
+		while f.tell() < end:
+			line = f.readline()
+			if not line:
+				break
+			yield line.decode("utf-8", "replace")
+
+def parse_chunk(chunk, province=None):
+	"""
+	Function to parse and normalize the records of a chunk.
+
+	Args:
+		chunk: Tuple from file_chunks().
+		province: String value containing the default province. (optional)
+
+	Returns:
+		The return value. Tuple of the number of records read and a list of
+		(key, row) tuples, where key is a 64-bit digest of the number,
+		street, city and province of the row.
+
+	"""
+	path, kind, start, end, header = chunk
+	if kind == "featurecollection":
+		with open(path, "r", encoding="utf-8-sig") as f:
+			collection = json.load(f)
+		if not isinstance(collection, dict) or collection.get("type") != "FeatureCollection":
+			raise ValueError("%s is not line-delimited GeoJSON or a GeoJSON FeatureCollection" % path)
+		records = (_feature_record(feature) for feature in collection.get("features") or [])
+	elif kind == "csv":
+		records = (dict(zip(header, values)) for values in csv.reader(_chunk_lines(path, start, end)))
+	else:
+		records = (_geojson_record(line) for line in _chunk_lines(path, start, end))
+	read = 0
+	rows = []
+	for record in records:
+		if record is None:
+			continue
+		read += 1
+		row = normalize_record(record, province)
+		if row is None:
+			continue
+		key = "\x1f".join([row[2], row[3].lower(), row[4].lower(), row[5].lower()]).encode("utf-8")
+		rows.append((int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little"), row))
+	return read, rows
+
+def _parse_task(task):
+	return parse_chunk(*task)
+
+def _bounded_imap(pool, function, tasks, limit):
+	"""
+	Function to map tasks over a pool in order with at most limit results pending.
+
+	"""
+	pending = collections.deque()
+	for task in tasks:
+		pending.append(pool.apply_async(function, (task,)))
+		if len(pending) >= limit:
+			yield pending.popleft().get()
+	while pending:
+		yield pending.popleft().get()
+
+def _grid_cell(latitude, longitude):
+	return int(float(latitude) // grid_size), int(float(longitude) // grid_size)
+
+class PostalCodeIndex(object):
+	"""
+	Offline postal code lookup built from the addresses that have one.
+
+	Every grid cell keeps the centre of the addresses of each postal code in
+	it, so memory grows with the number of postal codes, not addresses.
+
+	Args:
+		max_rings: Integer value containing the number of grid rings searched
+			around an address. (optional)
+
+	"""
+
+	def __init__(self, max_rings=8):
+		self.max_rings = max_rings
+		self.cells = {}
+		self.cities = {}
+
+	def add(self, row):
+		"""
+		Function to add an address row with a postal code.
+
+		"""
+		codes = self.cells.setdefault(_grid_cell(row[0], row[1]), {})
+		centre = codes.get(row[6])
+		if centre is None:
+			codes[row[6]] = [float(row[0]), float(row[1]), 1]
+		else:
+			centre[0] += float(row[0])
+			centre[1] += float(row[1])
+			centre[2] += 1
+		counts = self.cities.setdefault((row[4].lower(), row[5].lower()), {})
+		counts[row[6]] = counts.get(row[6], 0) + 1
+
+	def nearest(self, latitude, longitude):
+		"""
+		Function to get the postal code whose addresses are centred nearest.
+
+		The ring after the first one with a match is searched too, as a
+		centre in it can be closer than one in a corner of the earlier ring.
+
+		Returns:
+			The return value. String value containing the postal code, empty
+			if there is none within max_rings cells.
+
+		"""
+		latitude = float(latitude)
+		longitude = float(longitude)
+		cell_latitude, cell_longitude = _grid_cell(latitude, longitude)
+		best = None
+		for ring in range(self.max_rings + 1):
+			if best is not None and ring > best_ring + 1:
+				break
+			for i in range(-ring, ring + 1):
+				for j in range(-ring, ring + 1):
+					if max(abs(i), abs(j)) != ring:
+						continue
+					codes = self.cells.get((cell_latitude + i, cell_longitude + j))
+					if not codes:
+						continue
+					for postal_code, centre in codes.items():
+						distance = (centre[0] / centre[2] - latitude) ** 2 + ((centre[1] / centre[2] - longitude) * 0.7) ** 2
+						if best is None or (distance, postal_code) < best:
+							if best is None:
+								best_ring = ring
+							best = (distance, postal_code)
+		return best[1] if best is not None else ""
+
+	def city(self, city, province):
+		"""
+		Function to get the most common postal code of a city.
+
+		Returns:
+			The return value. String value containing the postal code, empty if unknown.
+
+		"""
+		counts = self.cities.get((city.lower(), province.lower()))
+		if not counts:
+			return ""
+		return max(sorted(counts), key=counts.get)
+
+	def lookup(self, row):
+		"""
+		Function to derive the postal code of an address row.
+
+		Returns:
+			The return value. String value containing the postal code, empty if unknown.
+
+		"""
+		return self.nearest(row[0], row[1]) or self.city(row[4], row[5])
+
+def ingest_files(paths, output, province=None, processes=None, chunk_size=64 << 20, shards=64):
+	"""
+	Function to ingest OpenAddresses files into an address store file.
+
+	Rows are written shard by shard, each shard in input order.
+
+	Args:
+		paths: List of CSV, line-delimited GeoJSON or GeoJSON FeatureCollection file paths.
+		output: String value containing the output asset store path.
+		province: String value containing the province of rows without a region. (optional)
+		processes: Integer value containing the number of parser processes,
+			defaults to the number of CPUs. (optional)
+		chunk_size: Integer value containing the approximate chunk size in bytes. (optional)
+		shards: Integer value containing the number of shard files rows are
+			deduplicated in; memory use is about the number of distinct rows
+			divided by it. (optional)
+
+	Returns:
+		The return value. Dict containing the number of records "read",
+		"invalid", "duplicates", "written", "derived_postal_codes" and
+		"dropped_no_postal_code".
+
+	"""
+	tasks = []
+	for path in paths:
+		tasks.extend((chunk, province) for chunk in file_chunks(path, chunk_size))
+	stats = {"read": 0, "invalid": 0, "duplicates": 0, "written": 0, "derived_postal_codes": 0, "dropped_no_postal_code": 0}
+	index = PostalCodeIndex()
+	writer = TableFileWriter(output, "canadian_data", 7)
+	pending_path = output + ".pending.tmp"
+	shard_paths = [output + ".shard%d.tmp" % shard for shard in range(shards)]
+	processes = processes or multiprocessing.cpu_count()
+	pool = multiprocessing.Pool(processes) if processes != 1 else None
+	try:
+		shard_files = [open(path, "w", newline="", encoding="utf-8") for path in shard_paths]
+		try:
+			shard_writers = [csv.writer(f) for f in shard_files]
+			results = _bounded_imap(pool, _parse_task, tasks, 2 * processes) if pool else (_parse_task(task) for task in tasks)
+			for read, rows in results:
+				stats["read"] += read
+				stats["invalid"] += read - len(rows)
+				for key, row in rows:
+					shard_writers[key % shards].writerow([key] + row)
+		finally:
+			for f in shard_files:
+				f.close()
+		with open(pending_path, "w", newline="", encoding="utf-8") as pending_file:
+			pending = csv.writer(pending_file)
+			for shard_path in shard_paths:
+				seen = set()
+				with open(shard_path, "r", newline="", encoding="utf-8") as shard_file:
+					for values in csv.reader(shard_file):
+						key = int(values[0])
+						if key in seen:
+							stats["duplicates"] += 1
+							continue
+						seen.add(key)
+						row = values[1:]
+						if row[6]:
+							index.add(row)
+							writer.write_row(row)
+							stats["written"] += 1
+						else:
+							pending.writerow(row)
+				os.remove(shard_path)
+		with open(pending_path, "r", newline="", encoding="utf-8") as pending_file:
+			for row in csv.reader(pending_file):
+				row[6] = index.lookup(row)
+				if not row[6]:
+					stats["dropped_no_postal_code"] += 1
+					continue
+				if not row[5]:
+					row[5] = postal_provinces.get(row[6][0], "")
+				writer.write_row(row)
+				stats["written"] += 1
+				stats["derived_postal_codes"] += 1
+	except BaseException:
+		writer.discard()
+		raise
+	else:
+		writer.close()
+	finally:
+		if pool:
+			pool.close()
+			pool.join()
+		for path in shard_paths + [pending_path]:
+			if os.path.exists(path):
+				os.remove(path)
+	return stats
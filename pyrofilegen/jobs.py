@@ -0,0 +1,236 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :jobs.py
+#description     :Checkpointed, resumable bulk generation jobs.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module runs long bulk generation jobs that write CSV/TSV output and
+periodically record a checkpoint next to it. An interrupted job can be
+resumed, in which case the output is truncated to the last checkpointed
+byte offset and generation continues from the recorded random state, so
+the result is identical to an uninterrupted run with the same seed.
+
+A checkpoint contains:
+	-The job settings (seed, format, fields, variation, count)
+	-The number of rows written and the output byte offset
+	-The CRC32 checksum of the output up to that offset
+	-The CRC32 checksum of the output written since the previous checkpoint
+	-The state of the random number generators
+	-The data quality sketches, if enabled
+
+Usage:
+	python -m pyrofilegen generate --count 2000000000 --seed 42 --output profiles.csv
+	python -m pyrofilegen generate --count 2000000000 --seed 42 --output profiles.csv --resume
+"""
+
+import json
+import os
+import zlib
+
+from . import pyrofilegen, sketches
+from .encoders import ProfileEncoder, delimiters
+
+def checkpoint_path_for(output):
+	"""
+	Function to get the default checkpoint path of an output file.
+
+	Args:
+		output: String value containing the output file path.
+
+	Returns:
+		The return value. String value containing the checkpoint file path.
+
+	"""
+	return output + ".checkpoint"
+
+def _encode_state(state):
+	"""
+	Function to convert a get_random_state() tuple into JSON compatible lists.
+
+	"""
+	return [[version, list(internal), gauss] for version, internal, gauss in state]
+
+def _decode_state(state):
+	"""
+	Function to convert JSON lists back into a get_random_state() tuple.
+
+	"""
+	return tuple((version, tuple(internal), gauss) for version, internal, gauss in state)
+
+def write_checkpoint(path, checkpoint):
+	"""
+	Function to atomically write a checkpoint file.
+
+	Args:
+		path: String value containing the checkpoint file path.
+		checkpoint: Dict containing the checkpoint.
+
+	"""
+	temp_path = path + ".tmp"
+	with open(temp_path, "w") as f:
+		json.dump(checkpoint, f)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(temp_path, path)
+
+def read_checkpoint(path):
+	"""
+	Function to read a checkpoint file.
+
+	Args:
+		path: String value containing the checkpoint file path.
+
+	Returns:
+		The return value. Dict containing the checkpoint, or None if it does not exist.
+
+	"""
+	if not os.path.exists(path):
+		return None
+	with open(path) as f:
+		return json.load(f)
+
+def _file_crc32(f, length, block_size=1 << 20, start=0):
+	"""
+	Function to compute the CRC32 checksum of a range of bytes of a file.
+
+	"""
+	f.seek(start)
+	crc = 0
+	remaining = length
+	while remaining > 0:
+		block = f.read(min(block_size, remaining))
+		if not block:
+			break
+		crc = zlib.crc32(block, crc)
+		remaining -= len(block)
+	return crc & 0xffffffff
+
+def run_job(output, count, seed=0, format="csv", fields=None, variation=False, checkpoint_every=100000, chunk_size=10000, resume=False, checkpoint_path=None, verify=True, verify_full=False, sketch=False):
+	"""
+	Function to run a checkpointed bulk generation job.
+
+	The module level random state is used for generation, so no other
+	generation should happen in the same process while the job runs. The
+	asset tables are loaded into memory first, see load_assets(); tables
+	already installed are kept.
+
+	Args:
+		output: String value containing the output file path.
+		count: Integer value containing the total number of profiles to generate.
+		seed: Integer value used as the seed of the job. (optional)
+		format: String value, either "csv" or "tsv". (optional)
+		fields: List of field keys, defaults to every profile field. (optional)
+		variation: Boolean value indicating whether variation is requested. (optional)
+		checkpoint_every: Integer value containing the number of rows between checkpoints. (optional)
+		chunk_size: Integer value containing the number of rows per write. (optional)
+		resume: Boolean value indicating whether to continue from the last checkpoint. (optional)
+		checkpoint_path: String value containing the checkpoint file path. (optional)
+		verify: Boolean value indicating whether the output written since the
+			previous checkpoint is verified against its checksum before
+			resuming. (optional)
+		verify_full: Boolean value indicating whether the checksum of the
+			whole output is also verified, which reads the entire file. (optional)
+		sketch: Boolean value indicating whether data quality sketches of the
+			generated profiles are kept and written next to the output, see
+			sketches.report_path_for(). (optional)
+
+	Returns:
+		The return value. Dict containing the final checkpoint.
+
+	"""
+	if format not in delimiters:
+		raise ValueError("Unknown output format: %s" % format)
+	fields = list(fields or pyrofilegen.profile_fields)
+	for field in fields:
+		if field not in pyrofilegen.profile_fields:
+			raise ValueError("Unknown profile field: %s" % field)
+	checkpoint_path = checkpoint_path or checkpoint_path_for(output)
+	settings = {"seed": seed, "format": format, "fields": fields, "variation": variation, "sketch": sketch}
+	encoder = ProfileEncoder(format, fields)
+	buffer = bytearray()
+	pyrofilegen.load_assets(replace=False)
+
+	checkpoint = read_checkpoint(checkpoint_path) if resume else None
+	if checkpoint is not None:
+		checkpoint.setdefault("sketch", False)
+		for key, value in settings.items():
+			if checkpoint[key] != value:
+				raise ValueError("Checkpoint %s was written with %s=%r, not %r" % (checkpoint_path, key, checkpoint[key], value))
+		f = open(output, "r+b")
+		if os.path.getsize(output) < checkpoint["byte_offset"]:
+			f.close()
+			raise ValueError("Output %s is shorter than its checkpoint" % output)
+		if "interval_offset" in checkpoint:
+			interval_length = checkpoint["byte_offset"] - checkpoint["interval_offset"]
+			if verify and _file_crc32(f, interval_length, start=checkpoint["interval_offset"]) != checkpoint["interval_crc32"]:
+				f.close()
+				raise ValueError("Output %s does not match its checkpoint checksum" % output)
+		else:
+			verify_full = verify_full or verify
+		if verify_full and _file_crc32(f, checkpoint["byte_offset"]) != checkpoint["crc32"]:
+			f.close()
+			raise ValueError("Output %s does not match its checkpoint checksum" % output)
+		f.seek(checkpoint["byte_offset"])
+		f.truncate()
+		pyrofilegen.set_random_state(_decode_state(checkpoint["random_state"]))
+		rows_written = checkpoint["rows_written"]
+		byte_offset = checkpoint["byte_offset"]
+		crc = checkpoint["crc32"]
+		interval_offset = byte_offset
+		interval_crc = 0
+		profile_sketch = sketches.ProfileSketch.from_dict(checkpoint["sketch_state"]) if sketch else None
+	else:
+		f = open(output, "wb")
+		pyrofilegen.seed(seed)
+		header = encoder.header()
+		f.write(header)
+		rows_written = 0
+		byte_offset = len(header)
+		crc = zlib.crc32(header) & 0xffffffff
+		interval_offset = 0
+		interval_crc = crc
+		profile_sketch = sketches.ProfileSketch() if sketch else None
+
+	def save_checkpoint(complete=False):
+		f.flush()
+		os.fsync(f.fileno())
+		checkpoint = dict(settings)
+		checkpoint.update({
+			"count": count,
+			"rows_written": rows_written,
+			"byte_offset": byte_offset,
+			"crc32": crc,
+			"interval_offset": interval_offset,
+			"interval_crc32": interval_crc,
+			"random_state": _encode_state(pyrofilegen.get_random_state()),
+			"complete": complete,
+		})
+		if profile_sketch is not None:
+			checkpoint["sketch_state"] = profile_sketch.to_dict()
+		write_checkpoint(checkpoint_path, checkpoint)
+		return checkpoint
+
+	try:
+		last_checkpoint = rows_written
+		while rows_written < count:
+			size = min(chunk_size, count - rows_written, checkpoint_every - (rows_written - last_checkpoint))
+			del buffer[:]
+			encoder.encode(pyrofilegen.stream_profiles(size, format=3, variation=variation, sketch=profile_sketch), buffer)
+			f.write(buffer)
+			rows_written += size
+			byte_offset += len(buffer)
+			crc = zlib.crc32(buffer, crc) & 0xffffffff
+			interval_crc = zlib.crc32(buffer, interval_crc) & 0xffffffff
+			if rows_written - last_checkpoint >= checkpoint_every and rows_written < count:
+				save_checkpoint()
+				last_checkpoint = rows_written
+				interval_offset = byte_offset
+				interval_crc = 0
+		if profile_sketch is not None:
+			profile_sketch.write_report(sketches.report_path_for(output))
+		return save_checkpoint(complete=True)
+	finally:
+		f.close()
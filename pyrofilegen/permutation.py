@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :permutation.py
+#description     :Seeded index hashing and permutations for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module provides stateless building blocks for deriving data from a
+(seed, index) pair instead of from shared random state:
+
+	-hash_index() maps a seed and an index to a well mixed 64-bit integer.
+	-IndexPermutation is a seeded bijection of range(size), computed per
+	 index in O(1) memory with a Feistel network and cycle walking.
+"""
+
+_mask64 = 0xFFFFFFFFFFFFFFFF
+
+def mix64(value):
+	"""
+	Function to mix the bits of an integer (SplitMix64 finalizer).
+
+	Args:
+		value: Integer value to mix.
+
+	Returns:
+		The return value. Integer value between 0 and 2**64-1.
+
+	"""
+	value = (value + 0x9E3779B97F4A7C15) & _mask64
+	value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _mask64
+	value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _mask64
+	return value ^ (value >> 31)
+
+def hash_index(seed, index):
+	"""
+	Function to derive a pseudo-random 64-bit integer from a seed and an index.
+
+	Args:
+		seed: Integer value used as the seed.
+		index: Integer value containing the index.
+
+	Returns:
+		The return value. Integer value between 0 and 2**64-1.
+
+	"""
+	return mix64(mix64(seed & _mask64) ^ (index & _mask64))
+
+class IndexPermutation(object):
+	"""
+	Seeded pseudo-random permutation of range(size).
+
+	Every index is mapped independently, so the permutation never has to
+	be materialized and can be evaluated from any process.
+
+	Args:
+		size: Integer value containing the size of the permuted range.
+		seed: Integer value used as the seed. (optional)
+		rounds: Integer value containing the number of Feistel rounds. (optional)
+
+	"""
+
+	def __init__(self, size, seed=0, rounds=4):
+		if size < 1:
+			raise ValueError("Permutation size must be at least 1")
+		self.size = size
+		self.seed = seed
+		bits = max(2, (size - 1).bit_length())
+		self._half_bits = (bits + 1) // 2
+		self._half_mask = (1 << self._half_bits) - 1
+		self._keys = [hash_index(seed, round) for round in range(rounds)]
+
+	def __len__(self):
+		return self.size
+
+	def _encrypt(self, value):
+		left = value >> self._half_bits
+		right = value & self._half_mask
+		for key in self._keys:
+			left, right = right, left ^ (mix64(key ^ right) & self._half_mask)
+		return (left << self._half_bits) | right
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += self.size
+		if index < 0 or index >= self.size:
+			raise IndexError("permutation index out of range")
+		value = self._encrypt(index)
+		while value >= self.size:
+			value = self._encrypt(value)
+		return value
+
+	def __iter__(self):
+		for index in range(self.size):
+			yield self[index]
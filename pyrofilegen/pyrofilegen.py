@@ -42,8 +42,34 @@ Attributes:
 	canadian_companies_file_name (str): File path & name of the main 
 		canadian_companies.txt file name.
 	province_list (list): List containing each province/territory in Canada.
+	profile_fields (list): List containing the key of each profile field, in
+		the order used by the list and dict profile formats.
+	profile_text_layout (list): List of (label, field) tuples of the text
+		profile format, in order.
+	profile_text_template (str): Template of the text profile format, built
+		from profile_text_layout.
 	faker (module): Module containing the initialization of the Faker library.
+	reference_year (int): Year card expiry dates are relative to, the
+		current year if None.
 	gender (str): Global variable to hold the gender of the current profile
+	stats_io_functions (list): Names of the functions instrumented as I/O
+		operations by enable_stats().
+	password_first_words (list): Words used in passwords in place of the first name.
+	password_last_words (list): Words used in passwords in place of the last name.
+	template_fields (dict): Dict mapping each template placeholder to a function
+		taking the profile values and returning the placeholder text.
+	email_templates (TemplateRegistry): Weighted templates of email user names.
+	password_templates (TemplateRegistry): Weighted templates of passwords.
+	variation_styles (list): Names of the variants of every varied value.
+	variation_cached_fields (list): Fields drawn from the asset tables, whose
+		variants are computed once per value and kept.
+	street_abbreviations (dict): Dict mapping street name words to their abbreviation.
+	variation_weights (dict): Dict mapping each varied field to the relative
+		frequency of each of its styles.
+	variations (VariationEngine): Variation engine used by the generators.
+	keyed_cache_size (int): Maximum number of keyed profiles kept by profile_for_key().
+	keyed_reference_year (int): Default reference year of profile_for_key(),
+		fixed so keyed profiles do not change with the calendar.
 """
 
 import time
@@ -53,11 +79,17 @@ import os
 from os.path import dirname
 import random
 import string
+import bisect
+import operator
+import contextlib
+import hashlib
+import hmac
+from collections import OrderedDict
 from faker import Faker
 import csv
 
-parent_path = dirname(dirname(os.path.abspath(__file__)))                               # Configure parent directory    
-assets_path = parent_path+'/assets/'                                                    # Configure assets directory                                             
+parent_path = dirname(os.path.abspath(__file__))                                        # Configure parent directory    
+assets_path = os.path.join(parent_path, 'assets')                                                  # Configure assets directory                                             
 
 # Data Paths
 #==============================================================================
@@ -66,17 +98,495 @@ canadian_area_codes_file_name = os.path.join(assets_path, 'canadian_area_codes.t
 canadian_companies_file_name = os.path.join(assets_path, 'canadian_companies.txt') 
 province_list = ["ontario", "quebec", "british columbia", "alberta", "manitoba", "saskatchewan", "nova scotia", "new brunswick", "newfoundland and labrador", 
 				 "prince edward island", "northwest territories", "nunavut", "yukon"]
+profile_fields = ["gender", "first_name", "last_name", "maiden_name", "dob_year", "dob_month", "dob_day", "dob_full", "height", "weight", "street_num", 
+				  "street_name", "city", "province", "postal_code", "lat_long", "credit_card", "credit_card_expiry", "credit_card_cvv", "credit_card_pin", 
+				  "email", "password", "phone_num", "sin", "drivers_license", "license_plate", "company", "astrological_sign"]
+profile_text_layout = [("Gender: ", "gender"), ("\nFirst Name: ", "first_name"), ("\nLast Name: ", "last_name"), ("\nMother's Maiden Name: ", "maiden_name"),
+					   ("\nDate of Birth: ", "dob_day"), ("-", "dob_month"), ("-", "dob_year"), ("\nHeight: ", "height"), ("\nWeight: ", "weight"),
+					   ("\nStreet Number: ", "street_num"), ("\nStreet Name: ", "street_name"), ("\nCity: ", "city"), ("\nProvince: ", "province"),
+					   ("\nPostal Code: ", "postal_code"), ("\nLat-Long: ", "lat_long"), ("\nCredit Card: ", "credit_card"),
+					   ("\nCredit Card Expiry: ", "credit_card_expiry"), ("\nCredit Card CVV: ", "credit_card_cvv"), ("\nCredit Card PIN: ", "credit_card_pin"),
+					   ("\nEmail: ", "email"), ("\nPassword: ", "password"), ("\nPhone Number: ", "phone_num"), ("\nSIN: ", "sin"),
+					   ("\nDriver's License: ", "drivers_license"), ("\nLicense Plate: ", "license_plate"), ("\nCompany: ", "company"),
+					   ("\nAstrological Sign: ", "astrological_sign")]
+profile_text_template = "".join([label.replace("%", "%%") + "%s" for label, field in profile_text_layout])
+_profile_text_values = operator.itemgetter(*[profile_fields.index(field) for label, field in profile_text_layout])
 #==============================================================================
 
 faker = Faker()
 gender = None
+_assets = {}
+_demographics = None
+reference_year = None
+
+def seed(value):
+	"""
+	Function to seed the random number generators used for generation.
+
+	Seeding makes every following generate_* call reproducible.
+
+	Args:
+		value: Integer/String value used as the seed.
+
+	"""
+	random.seed(value)
+	faker.seed_instance(value)
+
+def get_random_state():
+	"""
+	Function to get the current state of the random number generators.
+
+	Returns:
+		The return value. Tuple containing the random and Faker generator states.
+
+	"""
+	return (random.getstate(), faker.random.getstate())
+
+def set_random_state(state):
+	"""
+	Function to restore a state returned by get_random_state().
+
+	Args:
+		state: Tuple containing the random and Faker generator states.
+
+	"""
+	random.setstate(state[0])
+	faker.random.setstate(state[1])
+
+@contextlib.contextmanager
+def seeded(value):
+	"""
+	Context manager to generate reproducibly from a seed without affecting
+	the surrounding random state.
+
+	Args:
+		value: Integer/String value used as the seed.
+
+	"""
+	state = get_random_state()
+	seed(value)
+	try:
+		yield
+	finally:
+		set_random_state(state)
+
+def set_demographics(demographics):
+	"""
+	Function to make the generators follow configurable demographic distributions.
+
+	Args:
+		demographics: distributions.Demographics instance, or None to go back
+			to the default uniform ranges.
+
+	"""
+	global _demographics
+	_demographics = demographics
+	if demographics is not None:
+		demographics.set_companies(read_companies())
+	_keyed_cache.clear()
+
+def install_assets(canadian_data=None, area_codes=None, companies=None):
+	"""
+	Function to use preloaded asset tables instead of reading the asset files.
+
+	Args:
+		canadian_data: Sequence of address rows, see help(read_canadian_data). (optional)
+		area_codes: Dict of area codes, see help(read_area_codes). (optional)
+		companies: Sequence of company names, see help(read_companies). (optional)
+
+	"""
+	if canadian_data is not None:
+		_assets['canadian_data'] = canadian_data
+	if area_codes is not None:
+		_assets['area_codes'] = area_codes
+	if companies is not None:
+		_assets['companies'] = companies
+		if _demographics is not None:
+			_demographics.set_companies(companies)
+	_keyed_cache.clear()
+
+def uninstall_assets():
+	"""
+	Function to go back to reading the asset files on every use.
+
+	"""
+	_assets.clear()
+	if _demographics is not None:
+		_demographics.set_companies(read_companies())
+	_keyed_cache.clear()
+	variations.clear()
+
+def load_assets(replace=True):
+	"""
+	Function to read every asset file once and keep the tables in memory.
+
+	Args:
+		replace: Boolean value indicating whether tables already installed
+			with install_assets() are read again from the files. (optional)
+
+	"""
+	if replace:
+		uninstall_assets()
+	install_assets(read_canadian_data(), read_area_codes(), read_companies())
+	canadian_data = read_canadian_data()
+	variations.compile('street_name', set(row[3] for row in canadian_data))
+	variations.compile('city', set(row[4] for row in canadian_data))
+	variations.compile('province', set(row[5] for row in canadian_data))
+	variations.compile('company', read_companies())
+
+def read_canadian_data():
+	"""
+	Function to read the address rows from canadian_data.csv.
+
+	Returns:
+		The return value. List containing each address row as a list of
+		[latitude, longitude, street_num, street_name, city, province, postal_code].
+
+	"""
+	if 'canadian_data' in _assets:
+		return _assets['canadian_data']
+	csv_file = open(canadian_data_file_name, 'r')
+	csv_reader = csv.reader(csv_file, delimiter=',')
+	next(csv_reader)
+	rows = list(csv_reader)
+	csv_file.close()
+	return rows
+
+def read_area_codes():
+	"""
+	Function to read the area code mapping from canadian_area_codes.txt.
+
+	Returns:
+		The return value. Dict mapping lowercase city/province names to area codes.
+
+	"""
+	if 'area_codes' in _assets:
+		return _assets['area_codes']
+	area_codes_file = open(canadian_area_codes_file_name, 'r')
+	area_code_dict = eval(area_codes_file.read())
+	area_codes_file.close()
+	return area_code_dict
+
+def read_companies():
+	"""
+	Function to read the company names from canadian_companies.txt.
+
+	Returns:
+		The return value. List containing each company name.
+
+	"""
+	if 'companies' in _assets:
+		return _assets['companies']
+	canadian_companies_file = open(canadian_companies_file_name, 'r')
+	canadian_companies_list = canadian_companies_file.read().split('\n')
+	canadian_companies_list = list(filter(None, canadian_companies_list))
+	canadian_companies_file.close()
+	return canadian_companies_list
+
+# Templates
+#==============================================================================
+password_first_words = ["god", "love", "lust", "money", "private", "qwerty", "secret", "snoopy", "disney", "kitty"]
+password_last_words = ["football", "hockey", "piano", "burger", "food", "password", "mushy", "nose", "dark", "doggy"]
+template_fields = {
+	'first': lambda values: values['first_name'],
+	'last': lambda values: values['last_name'],
+	'first_initial': lambda values: values['first_name'][0],
+	'last_initial': lambda values: values['last_name'][0],
+	'dob_year': lambda values: values['dob_year'],
+	'dob_yy': lambda values: values['dob_year'][2:],
+	'dob_month': lambda values: values['dob_month'],
+	'dob_day': lambda values: values['dob_day'],
+	'year': lambda values: str(random.randint(2002,2016)),
+	'two_digits': lambda values: str(random.randint(20,99)),
+	'four_digits': lambda values: str(random.randint(0,9999)),
+}
+
+class TemplateRegistry(object):
+	"""
+	Weighted set of compiled string templates.
+
+	A template is chosen first and only the chosen template is formatted, so
+	the placeholders of the other templates are never computed. Templates use
+	{placeholder} names from template_fields, e.g. "{first}.{last}{two_digits}".
+	The version attribute is increased by every registered template, so
+	output cached elsewhere can tell that it is stale.
+
+	Args:
+		templates: List of patterns or (pattern, weight) tuples. (optional)
+
+	"""
+
+	def __init__(self, templates=None):
+		self.version = 0
+		self.patterns = []
+		self._compiled = []
+		self._cumulative = []
+		for template in templates or []:
+			if isinstance(template, tuple):
+				self.register(template[0], template[1])
+			else:
+				self.register(template)
+
+	def register(self, pattern, weight=1):
+		"""
+		Function to add a template.
+
+		Args:
+			pattern: String value containing the template pattern.
+			weight: Number containing the relative frequency of the template. (optional)
+
+		"""
+		if weight <= 0:
+			raise ValueError("Template weight must be positive")
+		format_string = []
+		producers = []
+		for literal, field, spec, conversion in string.Formatter().parse(pattern):
+			format_string.append(literal.replace('%', '%%'))
+			if field is not None:
+				if field not in template_fields:
+					raise ValueError("Unknown template placeholder: %s" % field)
+				if spec or conversion:
+					raise ValueError("Template placeholders do not support format specs or conversions: %s" % field)
+				format_string.append('%s')
+				producers.append(template_fields[field])
+		total = self._cumulative[-1] if self._cumulative else 0
+		self.patterns.append((pattern, weight))
+		self._compiled.append((''.join(format_string), tuple(producers)))
+		self._cumulative.append(total + weight)
+		self.version += 1
+
+	def choose(self):
+		"""
+		Function to choose a template index according to the weights.
+
+		Returns:
+			The return value. Integer value containing the template index.
+
+		"""
+		return bisect.bisect_right(self._cumulative, random.random() * self._cumulative[-1])
+
+	def render(self, index, values):
+		"""
+		Function to format a single template.
+
+		Args:
+			index: Integer value containing the template index.
+			values: Dict containing the profile values used by the placeholders.
+
+		Returns:
+			The return value. String value containing the formatted template.
+
+		"""
+		format_string, producers = self._compiled[index]
+		return format_string % tuple([producer(values) for producer in producers])
+
+	def format(self, values):
+		"""
+		Function to choose and format a template.
+
+		Args:
+			values: Dict containing the profile values used by the placeholders.
+
+		Returns:
+			The return value. String value containing the formatted template.
+
+		"""
+		return self.render(self.choose(), values)
+
+email_templates = TemplateRegistry(["{last_initial}.{first}{dob_year}", "{last}{first}{year}", "{first}.{last}{two_digits}", "{first}_{last}{dob_yy}",
+									"{last}_{first}{dob_year}", "{first}{last}{dob_yy}", "{last}{four_digits}"])
+password_templates = TemplateRegistry(["{first_initial}.{last}{dob_yy}", "{last}{dob_month}{dob_day}", "{last_initial}.{first}{dob_year}", "{last}{first}{year}",
+									   "{first}.{last}{two_digits}", "{first}_{last}{dob_yy}", "{last}_{first}{dob_year}", "{first}{last}{dob_yy}", "{last}{four_digits}"])
+
+# Variation
+#==============================================================================
+variation_styles = ["original", "upper", "lower", "abbreviated_upper", "abbreviated_lower"]
+variation_cached_fields = ["street_name", "city", "province", "company"]
+street_abbreviations = {"Street": "St.", "Crescent": "Cres.", "Road": "Rd.", "Avenue": "Ave.", "Drive": "Dr.", "Lane": "Ln."}
+variation_weights = {
+	"first_name": {"original": 25, "upper": 25, "lower": 50},
+	"last_name": {"original": 25, "upper": 25, "lower": 50},
+	"street_name": {"original": 25, "abbreviated_upper": 25, "abbreviated_lower": 25, "lower": 25},
+	"city": {"original": 25, "upper": 25, "lower": 50},
+	"province": {"original": 25, "upper": 25, "lower": 50},
+	"postal_code": {"original": 25, "upper": 25, "lower": 50},
+	"company": {"original": 25, "upper": 25, "lower": 50},
+	"astrological_sign": {"original": 25, "upper": 25, "lower": 50},
+}
+
+class VariationEngine(object):
+	"""
+	Precomputed casing and abbreviation variants of field values.
+
+	Values of the cached fields, which come from the bounded asset tables,
+	are converted into all of their variation_styles once and kept, so
+	varying them is a weighted draw of a style index and a tuple lookup.
+	Values of other fields, e.g. Faker names or postal codes, are converted
+	into the drawn style only and not kept. Each field draws its style
+	independently, with its own weights. The version attribute is increased
+	whenever weights are set.
+
+	Args:
+		weights: Dict mapping field to a dict of style to relative frequency. (optional)
+		cached_fields: List of the fields whose variants are kept. (optional)
+
+	"""
+
+	def __init__(self, weights=None, cached_fields=None):
+		self.version = 0
+		self._tables = {}
+		self._variants = {}
+		self.cached_fields = set(cached_fields or [])
+		for field, field_weights in (weights or {}).items():
+			self.set_weights(field, field_weights)
+
+	def set_weights(self, field, weights):
+		"""
+		Function to set how often each style of a field is used.
+
+		Args:
+			field: String value containing the field name.
+			weights: Dict mapping style names from variation_styles to relative
+				frequencies, styles not listed are not used.
+
+		"""
+		styles = []
+		cumulative = []
+		total = 0
+		for index, style in enumerate(variation_styles):
+			weight = weights.get(style, 0)
+			if weight > 0:
+				total += weight
+				styles.append(index)
+				cumulative.append(total)
+		for style in weights:
+			if style not in variation_styles:
+				raise ValueError("Unknown variation style: %s" % style)
+		if not styles:
+			raise ValueError("A field needs at least one style with a positive weight")
+		self._tables[field] = (styles, cumulative)
+		self.version += 1
+
+	def variants(self, field, value):
+		"""
+		Function to get every variant of a value, computing them on first use
+		and keeping them if the field is cached.
+
+		Args:
+			field: String value containing the field name.
+			value: String value containing the value.
+
+		Returns:
+			The return value. Tuple of the variants in variation_styles order.
+
+		"""
+		cache = self._variants.get(field)
+		variants = cache.get(value) if cache is not None else None
+		if variants is None:
+			if field == 'street_name':
+				original = string.capwords(str(value).lower())
+				abbreviated = ' '.join([street_abbreviations.get(word, word) for word in original.split(' ')])
+			else:
+				original = abbreviated = str(value)
+			variants = (original, original.upper(), original.lower(), abbreviated.upper(), abbreviated.lower())
+			if field in self.cached_fields:
+				self._variants.setdefault(field, {})[value] = variants
+		return variants
+
+	def variant(self, field, value, style):
+		"""
+		Function to get one variant of a value without keeping it.
+
+		Args:
+			field: String value containing the field name.
+			value: String value containing the value.
+			style: Integer value containing the index into variation_styles.
+
+		Returns:
+			The return value. String value containing the variant.
+
+		"""
+		cache = self._variants.get(field)
+		if cache is not None and value in cache:
+			return cache[value][style]
+		value = str(value)
+		if field == 'street_name':
+			value = string.capwords(value.lower())
+			if style >= 3:
+				value = ' '.join([street_abbreviations.get(word, word) for word in value.split(' ')])
+		if style == 1 or style == 3:
+			return value.upper()
+		elif style == 2 or style == 4:
+			return value.lower()
+		return value
+
+	def compile(self, field, values):
+		"""
+		Function to precompute the variants of many values, e.g. of an asset table.
+
+		Args:
+			field: String value containing the field name.
+			values: Iterable of values.
+
+		"""
+		for value in values:
+			self.variants(field, value)
+
+	def style(self, field, chance=None):
+		"""
+		Function to draw the style of a field.
+
+		Args:
+			field: String value containing the field name.
+			chance: Integer between 1-100 used instead of a new random draw. (optional)
+
+		Returns:
+			The return value. Integer value containing the index into variation_styles.
+
+		"""
+		styles, cumulative = self._tables[field]
+		if chance:
+			point = (int(chance) - 1) * cumulative[-1] / 100.0
+		else:
+			point = random.random() * cumulative[-1]
+		return styles[min(bisect.bisect_right(cumulative, point), len(styles) - 1)]
+
+	def vary(self, field, value, chance=None):
+		"""
+		Function to get a variant of a value in a randomly drawn style.
+
+		Args:
+			field: String value containing the field name.
+			value: String value containing the value.
+			chance: Integer between 1-100 used instead of a new random draw. (optional)
+
+		Returns:
+			The return value. String value containing the variant.
+
+		"""
+		style = self.style(field, chance)
+		if field in self.cached_fields:
+			return self.variants(field, value)[style]
+		return self.variant(field, value, style)
+
+	def clear(self):
+		"""
+		Function to forget the precomputed variants, e.g. after the assets changed.
+
+		"""
+		self._variants.clear()
+
+variations = VariationEngine(variation_weights, variation_cached_fields)
 
 def generate_first_name(chance=None, variation=False):
 	"""
 	Function to generate the first name of the profile based on gender.
 
+	The variation style is drawn independently of the chance, so casing is
+	not correlated with gender.
+
 	Args:
-		chance: Integer between 1-100 used for the variation option. (not required)
+		chance: Integer between 1-100 used to choose the gender. (not required)
 		variation: Boolean value indicating whether variation is requested. (optional)
 
 	Returns:
@@ -86,32 +596,21 @@ def generate_first_name(chance=None, variation=False):
 	global gender
 	if not chance:
 		chance = random.randint(1, 100)
-	if chance >= 50:
+	if _demographics is not None:
+		male = _demographics.gender() == 'Male'
+	else:
+		male = chance >= 50
+	if male:
 		gender = 'Male'
 		first_name = str(faker.first_name_male())
-		if variation:
-			if chance <= 25:
-				pass
-			elif chance > 25 and chance <= 50:
-				gender = gender.upper()
-				first_name = first_name.upper()
-			else:
-				gender = gender.lower()
-				first_name = first_name.lower()
-		return first_name
 	else:
 		gender = 'Female'
 		first_name = str(faker.first_name_female())
-		if variation:
-			if chance <= 25:
-				pass
-			elif chance > 25 and chance <= 50:
-				gender = gender.upper()
-				first_name = first_name.upper()
-			else:
-				gender = gender.lower()
-				first_name = first_name.lower()
-		return first_name
+	if variation:
+		style = variations.style('first_name')
+		gender = variations.variant('first_name', gender, style)
+		first_name = variations.variant('first_name', first_name, style)
+	return first_name
 
 def generate_last_name(chance=None, variation=False):
 	"""
@@ -125,16 +624,9 @@ def generate_last_name(chance=None, variation=False):
 		The return value. String value containing profile last name.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	last_name = str(faker.last_name())
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			last_name = last_name.upper()
-		else:
-			last_name = last_name.lower()
+		last_name = variations.vary('last_name', last_name, chance)
 	return last_name
 
 def generate_dob_year():
@@ -145,6 +637,8 @@ def generate_dob_year():
 		The return value. String value containing year for date of birth.
 
 	"""
+	if _demographics is not None:
+		return str("%02d" % _demographics.dob_year())
 	return str("%02d" % random.randint(1950,1996))
 
 def generate_dob_month():
@@ -157,14 +651,20 @@ def generate_dob_month():
 	"""
 	return str("%02d" % random.randint(1,12))
 
-def generate_dob_day():
+def generate_dob_day(dob_year=None, dob_month=None):
 	"""
 	Function to generate the day for date of birth of the profile.
 
+	Args:
+		dob_year: String value for the date of birth year of profile (optional)
+		dob_month: String value for the date of birth month of profile (optional)
+
 	Returns:
 		The return value. String value containing day for date of birth.
 
 	"""
+	if _demographics is not None and dob_year and dob_month:
+		return str("%02d" % _demographics.dob_day(dob_year, dob_month))
 	return str("%02d" % random.randint(2,27))
 
 def generate_dob_full(format="mmddyyyy"):
@@ -264,9 +764,9 @@ def generate_card_expiry_year():
 		The return value. String value containing credit card expiry year.
 
 	"""
-	now = datetime.datetime.now()
-	earliest_year = now.year+2-2000
-	latest_year = now.year+4-2000
+	year = reference_year or datetime.date.today().year
+	earliest_year = year+2-2000
+	latest_year = year+4-2000
 	return str(random.randint(earliest_year,latest_year))
 
 def generate_card_expiry(format="mm/yy"):
@@ -322,19 +822,16 @@ def generate_password(chance=None, first_name=None, last_name=None, dob_year=Non
 	if not chance:
 		chance = random.randint(1,100)
 	if not first_name or chance > 75:
-		first_name_choices = ["god", "love", "lust", "money", "private", "qwerty", "secret", "snoopy", "disney", "kitty"]
-		first_name = str(random.choice(first_name_choices))
+		first_name = random.choice(password_first_words)
 	if not last_name:
-		last_name_choices = ["football", "hockey", "piano", "burger", "food", "password", "mushy", "nose", "dark", "doggy"]
-		last_name = str(random.choice(last_name_choices))
+		last_name = random.choice(password_last_words)
 	if not dob_year:
 		dob_year = generate_dob_year()
 	if not dob_month:
 		dob_month = generate_dob_month()
 	if not dob_day:
 		dob_day = generate_dob_day()
-	password_choices = ["%s.%s%s" % (first_name[0], last_name,dob_year[2:]), "%s%s%s" % (last_name,dob_month,dob_day), "%s.%s%s" % (last_name[0], first_name, dob_year), "%s%s%s" % (last_name, first_name, str(random.randint(2002,2016))), "%s.%s%s" % (first_name, last_name, str(random.randint(20,99))), "%s_%s%s" % (first_name, last_name,dob_year[2:]), "%s_%s%s" % (last_name, first_name, dob_year),"%s%s%s" % (first_name, last_name, dob_year[2:]), "%s%s" %(last_name, str(random.randint(0,9999)))]
-	password = str(random.choice(password_choices)).lower()
+	password = password_templates.format({'first_name':first_name, 'last_name':last_name, 'dob_year':dob_year, 'dob_month':dob_month, 'dob_day':dob_day}).lower()
 	if chance <= 25:
 		pass
 	elif chance > 25 and chance <= 50:
@@ -457,8 +954,9 @@ def generate_email(chance=None, first_name=None, last_name=None, dob_year=None,
 		dob_month = generate_dob_month()
 	if not dob_day:
 		dob_day = generate_dob_day()
-	email_choices = ["%s.%s%s" % (last_name[0], first_name, dob_year), "%s%s%s" % (last_name, first_name, str(random.randint(2002,2016))), "%s.%s%s" % (first_name, last_name, str(random.randint(20,99))), "%s_%s%s" % (first_name, last_name,dob_year[2:]), "%s_%s%s" % (last_name, first_name, dob_year),"%s%s%s" % (first_name, last_name, dob_year[2:]), "%s%s" %(last_name, str(random.randint(0,9999)))]
-	email = str(random.choice(email_choices)).lower()
+	email = email_templates.format({'first_name':first_name, 'last_name':last_name, 'dob_year':dob_year, 'dob_month':dob_month, 'dob_day':dob_day}).lower()
+	if _demographics is not None:
+		return email + "@" + _demographics.email_domain()
 	if chance <= 35:  
 		return email + "@hotmail.com"
 	elif chance > 35 and chance <= 50:
@@ -485,7 +983,7 @@ def generate_phone_number(location=None, format=5):
 		The return value. String value containing the phone number.
 
 	"""
-	area_code_dict = eval(open(canadian_area_codes_file_name).read())
+	area_code_dict = read_area_codes()
 	area_code = None
 	if location:
 		if isinstance(location, str):
@@ -524,10 +1022,7 @@ def generate_street_number(row=None):
 
 	"""
 	if not row:
-		csv_file = open(canadian_data_file_name, 'r')
-		csv_reader = csv.reader(csv_file, delimiter=',')
-		row = random.choice(list(csv_reader))
-		csv_file.close()
+		row = random.choice(read_canadian_data())
 	return str(row[2])
 
 def generate_street_name(chance=None, variation=False, row=None):
@@ -543,37 +1038,11 @@ def generate_street_name(chance=None, variation=False, row=None):
 		The return value. String value containing the street name.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	if not row:
-		csv_file = open(canadian_data_file_name, 'r')
-		csv_reader = csv.reader(csv_file, delimiter=',')
-		row = random.choice(list(csv_reader))
-		csv_file.close()
-	temp = str(row[3]).lower()
-	street_name = string.capwords(temp)
+		row = random.choice(read_canadian_data())
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			street_name = street_name.replace("Street", "St.")
-			street_name = street_name.replace("Crescent", "Cres")
-			street_name = street_name.replace("Road", "Rd")
-			street_name = street_name.replace("Avenue", "Ave")
-			street_name = street_name.replace("Drive", "Dr.")
-			street_name = street_name.replace("Lane", "Ln")
-			street_name = street_name.upper()
-		elif chance > 50 and chance <= 75:
-			street_name = street_name.replace("Street", "St.")
-			street_name = street_name.replace("Crescent", "Cres.")
-			street_name = street_name.replace("Road", "Rd.")
-			street_name = street_name.replace("Avenue", "Ave.")
-			street_name = street_name.replace("Drive", "Dr.")
-			street_name = street_name.replace("Lane", "Ln.")
-			street_name = street_name.lower()
-		elif chance > 75:
-			street_name = street_name.lower()
-	return street_name
+		return variations.vary('street_name', row[3], chance)
+	return variations.variant('street_name', row[3], 0)
 
 def generate_postal_code(chance=None, variation=False, row=None):
 	"""
@@ -588,21 +1057,11 @@ def generate_postal_code(chance=None, variation=False, row=None):
 		The return value. String value containing the postal code.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	if not row:
-		csv_file = open(canadian_data_file_name, 'r')
-		csv_reader = csv.reader(csv_file, delimiter=',')
-		row = random.choice(list(csv_reader))
-		csv_file.close()
+		row = random.choice(read_canadian_data())
 	postal_code = str(row[6])
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			postal_code = postal_code.upper()
-		else:
-			postal_code = postal_code.lower()
+		postal_code = variations.vary('postal_code', postal_code, chance)
 	return postal_code
 
 def generate_city(chance=None, variation=False, row=None):
@@ -618,21 +1077,11 @@ def generate_city(chance=None, variation=False, row=None):
 		The return value. String value containing the city.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	if not row:
-		csv_file = open(canadian_data_file_name, 'r')
-		csv_reader = csv.reader(csv_file, delimiter=',')
-		row = random.choice(list(csv_reader))
-		csv_file.close()
+		row = random.choice(read_canadian_data())
 	city = str(row[4])
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			city = city.upper()
-		else:
-			city = city.lower()
+		city = variations.vary('city', city, chance)
 	return city
 
 def generate_province(chance=None, variation=False, row=None):
@@ -648,20 +1097,13 @@ def generate_province(chance=None, variation=False, row=None):
 		The return value. String value containing the province.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	if not row:
 		province = random.choice(province_list)
 		province = string.capwords(province)
 	else:
 		province = str(row[5])
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			province = province.upper()
-		else:
-			province = province.lower()
+		province = variations.vary('province', province, chance)
 	return province
 
 def generate_lat_long(format=1, row=None):
@@ -680,10 +1122,7 @@ def generate_lat_long(format=1, row=None):
 
 	"""
 	if not row:
-		csv_file = open(canadian_data_file_name, 'r')
-		csv_reader = csv.reader(csv_file, delimiter=',')
-		row = random.choice(list(csv_reader))
-		csv_file.close()
+		row = random.choice(read_canadian_data())
 	lat_long = str(row[0]+","+row[1])
 	if format == 1 or format == "1":
 		return lat_long
@@ -695,7 +1134,7 @@ def generate_lat_long(format=1, row=None):
 	else:
 		return None
 
-def generate_address_full(chance=None, variation=False, format=1):
+def generate_address_full(chance=None, variation=False, format=1, row=None):
 	"""
 	Function to generate the full address of the profile.
 	
@@ -706,29 +1145,25 @@ def generate_address_full(chance=None, variation=False, format=1):
 			Options include: 
 			-1 (Str value)
 			-2 (List value)
+		row: Comma delimited row from canadian_data.csv. (not required)
 
 	Returns:
 		The return value. String/List value containing the full address.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
-	csv_file = open(canadian_data_file_name, 'r')
-	csv_reader = csv.reader(csv_file, delimiter=',')
-	random_row = random.choice(list(csv_reader))
-	csv_file.close()
+	random_row = row if row else random.choice(read_canadian_data())
 	if format == 1 or format == "1":
 		return "%s %s, %s, %s, %s" % (generate_street_number(row=random_row),generate_street_name(chance=chance, variation=variation,row=random_row),generate_city(chance=chance, variation=variation,row=random_row),generate_province(chance=chance, variation=variation,row=random_row),generate_postal_code(chance=chance, variation=variation,row=random_row))
 	elif format == 2 or format == "2":
 		address_list=[]
 		address_list.append(generate_street_number(row=random_row))
-		address_list.append(generate_street_name(variation,row=random_row))
-		address_list.append(generate_city(variation,row=random_row))
-		address_list.append(generate_province(variation,row=random_row))
-		address_list.append(generate_postal_code(variation,row=random_row))
+		address_list.append(generate_street_name(chance=chance, variation=variation, row=random_row))
+		address_list.append(generate_city(chance=chance, variation=variation, row=random_row))
+		address_list.append(generate_province(chance=chance, variation=variation, row=random_row))
+		address_list.append(generate_postal_code(chance=chance, variation=variation, row=random_row))
 		return address_list
 
-def generate_address_min(chance=None, variation=False, format=1):
+def generate_address_min(chance=None, variation=False, format=1, row=None):
 	"""
 	Function to generate the minimum address of the profile.
 	
@@ -739,17 +1174,13 @@ def generate_address_min(chance=None, variation=False, format=1):
 			Options include: 
 			-1 (Str value)
 			-2 (List value)
+		row: Comma delimited row from canadian_data.csv. (not required)
 
 	Returns:
 		The return value. String/List value containing the minimum address.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
-	csv_file = open(canadian_data_file_name, 'r')
-	csv_reader = csv.reader(csv_file, delimiter=',')
-	random_row = random.choice(list(csv_reader))
-	csv_file.close()
+	random_row = row if row else random.choice(read_canadian_data())
 	if format == 1 or format == "1":
 		return "%s %s, %s" % (generate_street_number(row=random_row),generate_street_name(chance=chance, variation=variation, row=random_row),generate_postal_code(chance=chance, variation=variation, row=random_row))
 	elif format == 2 or format == "2":
@@ -783,12 +1214,11 @@ def generate_astrological_sign(chance=None, dob_month=None, dob_day=None, variat
 		The return value. String value containing the astrological sign.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
 	if not dob_month:
 		dob_month = str(random.randint(1,12))
 	if not dob_day:
 		dob_day = str(random.randint(1,28))
+	dob_day = int(dob_day)
 	try:
 		dob_month = dob_month.lower()
 	except:
@@ -820,12 +1250,7 @@ def generate_astrological_sign(chance=None, dob_month=None, dob_day=None, variat
 	else:
 		return None
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			astro_sign = astro_sign.upper()
-		else:
-			astro_sign = astro_sign.lower()
+		astro_sign = variations.vary('astrological_sign', astro_sign, chance)
 	return str(astro_sign)
 
 def generate_license_plate(province=None):
@@ -888,20 +1313,12 @@ def generate_company(chance=None, variation=False):
 		The return value. String value containing the company.
 
 	"""
-	if not chance:
-		chance = random.randint(1,100)
-	canadian_companies_file = open(canadian_companies_file_name, 'r+')                                       
-	canadian_companies_list = canadian_companies_file.read().split('\n') 
-	canadian_companies_list = list(filter(None, canadian_companies_list))
-	canadian_companies_file.close()
-	company = random.choice(canadian_companies_list)
+	if _demographics is not None:
+		company = _demographics.company()
+	else:
+		company = random.choice(read_companies())
 	if variation:
-		if chance <= 25:
-			pass
-		elif chance > 25 and chance <= 50:
-			company = company.upper()
-		else:
-			company = company.lower()
+		company = variations.vary('company', company, chance)
 	return company
 
 def generate_height(chance=None):
@@ -918,6 +1335,9 @@ def generate_height(chance=None):
 	if not chance:
 		chance = random.randint(1,100)
 	global gender
+	if _demographics is not None:
+		inches = _demographics.height(gender)
+		return "%s'%s" % (inches // 12, inches % 12)
 	if gender.lower() == "male":
 		if chance > 85:
 			return "6'"+str(random.randint(0,4))
@@ -935,12 +1355,14 @@ def generate_weight():
 
 	"""
 	global gender
+	if _demographics is not None:
+		return str(_demographics.weight(gender))+" lbs"
 	if gender.lower() == "male":
 		return str(random.randint(160,230))+" lbs"
 	elif gender.lower() == "female":
 		return str(random.randint(115,160))+" lbs"
 
-def generate_profile(format=1, variation=False, phone_num_format=5, card_expiry_format="mm/yy"):
+def generate_profile(format=1, variation=False, phone_num_format=5, card_expiry_format="mm/yy", row=None):
 	"""
 	Function to generate the profile.
 	
@@ -953,44 +1375,376 @@ def generate_profile(format=1, variation=False, phone_num_format=5, card_expiry_
 		variation: Boolean value indicating whether variation is requested. (optional)
 		phone_num_format: See help(generate_phone_number).
 		card_expiry_format: See help(generate_card_expiry).
+		row: Comma delimited row from canadian_data.csv used for the address. (not required)
 
 	Returns:
 		The return value. String/List/Dict value containing the profile.
 
 	"""
 	chance = random.randint(1,100)
-	csv_file = open(canadian_data_file_name, 'r')
-	csv_reader = csv.reader(csv_file, delimiter=',')
-	row = random.choice(list(csv_reader))
-	csv_file.close()
-	first_name = str(generate_first_name(chance=chance, variation=variation))
-	last_name = str(generate_last_name(chance=chance, variation=variation))
-	mmm = str(generate_last_name(chance=chance, variation=variation))
-	dob_year = str(generate_dob_year())
-	dob_month = str(generate_dob_month())
-	dob_day = str(generate_dob_day())
+	if not row:
+		row = random.choice(read_canadian_data())
+	first_name = generate_first_name(chance=chance, variation=variation)
+	last_name = generate_last_name(variation=variation)
+	mmm = generate_last_name(variation=variation)
+	dob_year = generate_dob_year()
+	dob_month = generate_dob_month()
+	dob_day = generate_dob_day(dob_year=dob_year, dob_month=dob_month)
 	height = generate_height(chance=chance)
 	weight = generate_weight()
-	address_full = generate_address_full(chance=chance, format=2, variation=variation)
-	lat_long = str(generate_lat_long())
-	credit_card = str(generate_credit_card())
+	address_full = generate_address_full(format=2, variation=variation, row=row)
+	lat_long = generate_lat_long(row=row)
+	credit_card = generate_credit_card()
 	credit_card_expiry = str(generate_card_expiry(format=card_expiry_format))
-	credit_card_cvv = str(generate_cvv())
-	credit_card_pin = str(generate_card_pin())
-	email = str(generate_email(first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day))
-	password = str(generate_password(first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day))
-	phone_num = str(generate_phone_number(location=[str(address_full[2]),str(address_full[3])], format=phone_num_format))
-	sin = str(generate_sin(province=str(address_full[3])))
-	drivers = str(generate_drivers_license(province=str(address_full[3]), first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day))
-	license_plate = str(generate_license_plate(province=str(address_full[3])))
-	company = str(generate_company(chance=chance, variation=variation))
-	astrological_sign = generate_astrological_sign(chance=chance, dob_month=dob_month, dob_day=dob_day, variation=variation)
+	credit_card_cvv = generate_cvv()
+	credit_card_pin = generate_card_pin()
+	email = generate_email(first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day)
+	password = generate_password(first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day)
+	phone_num = str(generate_phone_number(location=[address_full[2],address_full[3]], format=phone_num_format))
+	sin = generate_sin(province=address_full[3])
+	drivers = str(generate_drivers_license(province=address_full[3], first_name=first_name, last_name=last_name, dob_year=dob_year, dob_month=dob_month, dob_day=dob_day))
+	license_plate = str(generate_license_plate(province=address_full[3]))
+	company = generate_company(variation=variation)
+	astrological_sign = generate_astrological_sign(dob_month=dob_month, dob_day=dob_day, variation=variation)
+	profile_values = [gender,first_name,last_name,mmm,dob_year,dob_month,dob_day,str("%s-%s-%s" % (dob_day,dob_month,dob_year)),height,weight,address_full[0],address_full[1],address_full[2],address_full[3],address_full[4],lat_long,credit_card,credit_card_expiry,credit_card_cvv,credit_card_pin,email,password,phone_num,sin,drivers,license_plate,company,astrological_sign]
+	return format_profile(profile_values, format=format)
+
+def format_profile(profile_values, format=1):
+	"""
+	Function to format the generated values of a profile.
+	
+	Args:
+		profile_values: List containing a value for each key in profile_fields.
+		format: See help(generate_profile).
+
+	Returns:
+		The return value. String/List/Dict value containing the profile.
+
+	"""
 	if format == 1 or format == "1":
-		return "Gender: %s\nFirst Name: %s\nLast Name: %s\nMother's Maiden Name: %s\nDate of Birth: %s-%s-%s\nHeight: %s\nWeight: %s\nStreet Number: %s\nStreet Name: %s\nCity: %s\nProvince: %s\nPostal Code: %s\nLat-Long: %s\nCredit Card: %s\nCredit Card Expiry: %s\nCredit Card CVV: %s\nCredit Card PIN: %s\nEmail: %s\nPassword: %s\nPhone Number: %s\nSIN: %s\nDriver's License: %s\nLicense Plate: %s\nCompany: %s\nAstrological Sign: %s" % (gender, first_name,last_name,mmm,dob_day,dob_month,dob_year,height,weight,str(address_full[0]),str(address_full[1]),str(address_full[2]),str(address_full[3]),str(address_full[4]),lat_long,credit_card,credit_card_expiry,credit_card_cvv,credit_card_pin,email,password,phone_num,sin,drivers,license_plate,company,astrological_sign)
+		return profile_text_template % _profile_text_values(profile_values)
 	elif format == 2 or format == "2":
-		profile_list=[]
-		profile_list.extend((gender,first_name,last_name,mmm,dob_year,dob_month,dob_day,str("%s-%s-%s" % (dob_day,dob_month,dob_year)),height,weight,address_full[0],address_full[1],address_full[2],address_full[3],address_full[4],lat_long,credit_card,credit_card_expiry,credit_card_cvv,credit_card_pin,email,password,phone_num,sin,drivers,license_plate,company))
-		return profile_list
+		return profile_values[:27]
 	elif format == 3 or format == "3":
-		profile_dict={'gender':gender, 'first_name':first_name, 'last_name':last_name, 'maiden_name':maiden_name, 'dob_year':dob_year, 'dob_month':dob_month, 'dob_day':dob_day, 'dob_full':str("%s-%s-%s" % (dob_day,dob_month,dob_year)), 'height':height, 'weight':weight, 'street_num':address_full[0], 'street_name':address_full[1], 'city':address_full[2], 'province':address_full[3], 'postal_code':address_full[4], 'lat_long':lat_long, 'credit_card':credit_card, 'credit_card_expiry':credit_card_expiry, 'credit_card_cvv':credit_card_cvv, 'credit_card_pin':credit_card_pin, 'email':email, 'password':password, 'phone_num':phone_num, 'sin':sin, 'drivers_license':drivers, 'license_plate':license_plate, 'company':company, 'astrological_sign':astrological_sign}
-		return profile_dict
\ No newline at end of file
+		return dict(zip(profile_fields, profile_values))
+
+def generate_profiles(count, format=1, variation=False, phone_num_format=5, card_expiry_format="mm/yy", rows=None, sketch=None):
+	"""
+	Function to generate a batch of profiles.
+	
+	Args:
+		count: Integer value containing the number of profiles to generate.
+		format: See help(generate_profile).
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		card_expiry_format: See help(generate_card_expiry).
+		rows: Iterable of address rows used for the profiles in order, e.g. a
+			sampling.AddressSampler. (optional)
+		sketch: Object updated with every profile through its update(profile)
+			method, e.g. a sketches.ProfileSketch. (optional)
+
+	Returns:
+		The return value. List containing the generated profiles.
+
+	"""
+	return list(stream_profiles(count=count, format=format, variation=variation, phone_num_format=phone_num_format, card_expiry_format=card_expiry_format, rows=rows, sketch=sketch))
+
+def stream_profiles(count=None, format=1, variation=False, phone_num_format=5, card_expiry_format="mm/yy", rows=None, sketch=None):
+	"""
+	Function to lazily generate profiles one at a time.
+	
+	Args:
+		count: Integer value containing the number of profiles to generate. 
+			Profiles are generated indefinitely if not given. (optional)
+		format: See help(generate_profile).
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		card_expiry_format: See help(generate_card_expiry).
+		rows: Iterable of address rows used for the profiles in order, e.g. a
+			sampling.AddressSampler. (optional)
+		sketch: Object updated with every profile through its update(profile)
+			method, e.g. a sketches.ProfileSketch. (optional)
+
+	Returns:
+		The return value. Generator yielding String/List/Dict profiles.
+
+	"""
+	if rows is not None:
+		rows = iter(rows)
+	counter = 0
+	while count is None or counter < count:
+		row = next(rows, None) if rows is not None else None
+		if rows is not None and row is None:
+			return
+		profile = generate_profile(format=format, variation=variation, phone_num_format=phone_num_format, card_expiry_format=card_expiry_format, row=row)
+		if sketch is not None:
+			sketch.update(profile)
+		yield profile
+		counter += 1
+
+# Keyed profiles
+#==============================================================================
+keyed_cache_size = 65536
+keyed_reference_year = 2025
+_keyed_cache = OrderedDict()
+_keyed_versions = None
+
+def key_seed(key, secret):
+	"""
+	Function to derive a seed from a key with a keyed hash (HMAC-SHA256).
+
+	Without the secret, the seed cannot be computed from the key, and the key
+	cannot be recovered from profiles generated with the seed.
+
+	Args:
+		key: String/Integer/Bytes value containing the key, e.g. a real customer ID.
+		secret: String/Bytes value containing the secret.
+
+	Returns:
+		The return value. Integer value containing the 64-bit seed.
+
+	"""
+	if not isinstance(key, bytes):
+		key = str(key).encode('utf-8')
+	if not isinstance(secret, bytes):
+		secret = str(secret).encode('utf-8')
+	return int.from_bytes(hmac.new(secret, key, hashlib.sha256).digest()[:8], 'little')
+
+def _keyed_profile(key, secret, format, variation, phone_num_format, card_expiry_format, year):
+	"""
+	Function to get a keyed profile from the cache, generating it on a miss.
+	Must be called with the random state saved by the caller.
+
+	"""
+	global reference_year, _keyed_versions
+	versions = (email_templates.version, password_templates.version, variations.version)
+	if versions != _keyed_versions:
+		_keyed_cache.clear()
+		_keyed_versions = versions
+	value = key_seed(key, secret)
+	cache_key = (value, format, variation, phone_num_format, card_expiry_format, year)
+	profile = _keyed_cache.get(cache_key)
+	if profile is not None:
+		_keyed_cache.move_to_end(cache_key)
+	else:
+		saved_year = reference_year
+		reference_year = year
+		try:
+			seed(value)
+			profile = generate_profile(format=format, variation=variation, phone_num_format=phone_num_format, card_expiry_format=card_expiry_format)
+		finally:
+			reference_year = saved_year
+		_keyed_cache[cache_key] = profile
+		while len(_keyed_cache) > keyed_cache_size:
+			_keyed_cache.popitem(last=False)
+	if isinstance(profile, dict):
+		return dict(profile)
+	elif isinstance(profile, list):
+		return list(profile)
+	return profile
+
+def profile_for_key(key, secret, format=3, variation=False, phone_num_format=5, card_expiry_format="mm/yy", year=None):
+	"""
+	Function to deterministically map a key to a profile.
+
+	The same key and secret always give the same profile, across processes
+	and runs, as long as the assets and demographics are the same. Dates
+	relative to the current year use a fixed reference year instead, and
+	demographics should be created with a fixed reference_year too. No
+	lookup table is kept; recently used keys are served from an LRU cache of
+	keyed_cache_size profiles, which is dropped when the assets,
+	demographics, templates or variation weights change. The surrounding
+	random state is not affected.
+
+	Args:
+		key: String/Integer/Bytes value containing the key, e.g. a real customer ID.
+		secret: String/Bytes value containing the secret.
+		format: See help(generate_profile).
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		card_expiry_format: See help(generate_card_expiry).
+		year: Integer value containing the reference year, defaults to
+			keyed_reference_year. (optional)
+
+	Returns:
+		The return value. String/List/Dict value containing the profile.
+
+	"""
+	state = get_random_state()
+	try:
+		return _keyed_profile(key, secret, format, variation, phone_num_format, card_expiry_format, year or keyed_reference_year)
+	finally:
+		set_random_state(state)
+
+def profiles_for_keys(keys, secret, format=3, variation=False, phone_num_format=5, card_expiry_format="mm/yy", year=None, batch_size=1000):
+	"""
+	Function to lazily map a stream of keys to profiles, see help(profile_for_key).
+
+	The random state is saved and restored once per batch instead of once
+	per key.
+
+	Args:
+		keys: Iterable of keys.
+		secret: String/Bytes value containing the secret.
+		format: See help(generate_profile).
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		card_expiry_format: See help(generate_card_expiry).
+		year: Integer value containing the reference year, defaults to
+			keyed_reference_year. (optional)
+		batch_size: Integer value containing the number of keys per batch. (optional)
+
+	Returns:
+		The return value. Generator yielding the profile of each key in order.
+
+	"""
+	keys = iter(keys)
+	year = year or keyed_reference_year
+	while True:
+		batch = []
+		state = get_random_state()
+		try:
+			for key in keys:
+				batch.append(_keyed_profile(key, secret, format, variation, phone_num_format, card_expiry_format, year))
+				if len(batch) == batch_size:
+					break
+		finally:
+			set_random_state(state)
+		for profile in batch:
+			yield profile
+		if len(batch) < batch_size:
+			return
+
+# Instrumentation
+#==============================================================================
+stats_io_functions = ["read_canadian_data", "read_area_codes", "read_companies"]
+_stats = {}
+_stats_hooks = []
+_stats_originals = {}
+
+def _instrument(name, kind, function):
+	"""
+	Function to wrap a module function so its calls are timed and counted.
+
+	Args:
+		name: String value containing the function name.
+		kind: String value containing the stats category of the function.
+		function: The original function.
+
+	Returns:
+		The return value. The wrapping function.
+
+	"""
+	timer = time.perf_counter
+	def instrumented(*args, **kwargs):
+		start = timer()
+		try:
+			return function(*args, **kwargs)
+		finally:
+			elapsed = timer() - start
+			entry = _stats.get(name)
+			if entry is None:
+				entry = _stats[name] = {'kind': kind, 'calls': 0, 'time': 0.0}
+			entry['calls'] += 1
+			entry['time'] += elapsed
+			for hook in _stats_hooks:
+				hook(name, kind, elapsed)
+	instrumented.__name__ = function.__name__
+	instrumented.__doc__ = function.__doc__
+	return instrumented
+
+def _stats_namespaces():
+	"""
+	Function to get this module and the package re-exporting its functions.
+
+	"""
+	modules = [sys.modules[__name__]]
+	package = sys.modules.get(__package__) if __package__ else None
+	if package is not None and package is not modules[0]:
+		modules.append(package)
+	return modules
+
+def enable_stats():
+	"""
+	Function to enable the collection of timing and call count stats.
+
+	Every field generator ("field"), asset read ("io"), profile formatting
+	("format") and generate_profile call ("profile") is timed. Times are
+	cumulative and include the time of nested calls. The functions are
+	replaced both in this module and in the pyrofilegen package namespace.
+	While disabled, the original functions are in place and there is no
+	overhead.
+
+	"""
+	if _stats_originals:
+		return
+	modules = _stats_namespaces()
+	module = modules[0]
+	for name in dir(module):
+		if name.startswith("generate_") and name != "generate_profiles":
+			kind = "profile" if name == "generate_profile" else "field"
+		elif name in stats_io_functions:
+			kind = "io"
+		elif name == "format_profile":
+			kind = "format"
+		else:
+			continue
+		function = getattr(module, name)
+		_stats_originals[name] = function
+		instrumented = _instrument(name, kind, function)
+		for namespace in modules:
+			if getattr(namespace, name, None) is function:
+				setattr(namespace, name, instrumented)
+
+def disable_stats():
+	"""
+	Function to disable the collection of stats and restore the original functions.
+
+	Collected stats are kept until reset_stats() is called.
+
+	"""
+	modules = _stats_namespaces()
+	for name, function in _stats_originals.items():
+		for namespace in modules:
+			if hasattr(namespace, name):
+				setattr(namespace, name, function)
+	_stats_originals.clear()
+
+def get_stats():
+	"""
+	Function to get the collected stats.
+
+	Returns:
+		The return value. Dict mapping function name to a dict containing its
+		'kind', number of 'calls' and cumulative 'time' in seconds.
+
+	"""
+	return dict((name, dict(entry)) for name, entry in _stats.items())
+
+def reset_stats():
+	"""
+	Function to clear the collected stats.
+
+	"""
+	_stats.clear()
+
+def add_stats_hook(hook):
+	"""
+	Function to register a callback that receives every timed call.
+
+	Args:
+		hook: Callable taking (name, kind, elapsed) arguments, e.g. to forward
+			timings to a metrics system.
+
+	"""
+	_stats_hooks.append(hook)
+
+def remove_stats_hook(hook):
+	"""
+	Function to unregister a callback added with add_stats_hook().
+
+	Args:
+		hook: The previously registered callable.
+
+	"""
+	_stats_hooks.remove(hook)
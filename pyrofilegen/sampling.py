@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :sampling.py
+#description     :Without-replacement address sampling for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module hands out address rows without replacement by walking a seeded
+permutation of the row indices instead of shuffling a copy of the table.
+
+Parallel workers sharing a seed each take every n-th position of the same
+permutation, so together they use every row exactly once per pass without
+any coordination. When the table runs out, the next pass continues with a
+new permutation derived from the seed and the pass number.
+
+Usage:
+	>>sampler = sampling.AddressSampler(seed=42, worker=3, workers=64)
+	>>pyrofilegen.generate_profiles(1000, format=3, rows=sampler)
+"""
+
+from . import pyrofilegen
+from .permutation import IndexPermutation, hash_index
+
+class AddressSampler(object):
+	"""
+	Iterator over address rows drawn without replacement.
+
+	Args:
+		seed: Integer value used as the seed, shared by all workers. (optional)
+		worker: Integer value containing the index of this worker. (optional)
+		workers: Integer value containing the total number of workers. (optional)
+		rows: Sequence of address rows, defaults to
+			pyrofilegen.read_canadian_data(). (optional)
+		start: Integer value containing the number of draws to skip, e.g. to
+			continue an earlier run. (optional)
+
+	"""
+
+	def __init__(self, seed=0, worker=0, workers=1, rows=None, start=0):
+		if workers < 1 or not 0 <= worker < workers:
+			raise ValueError("worker must be between 0 and workers - 1")
+		self.seed = seed
+		self.worker = worker
+		self.workers = workers
+		self.rows = rows if rows is not None else pyrofilegen.read_canadian_data()
+		if not len(self.rows):
+			raise ValueError("No address rows to sample from")
+		self.draws = start
+		self._permutation = None
+		self._epoch = None
+
+	def index_at(self, draw):
+		"""
+		Function to get the row index of one of this worker's draws.
+
+		Args:
+			draw: Integer value containing the draw number of this worker.
+
+		Returns:
+			The return value. Integer value containing the row index.
+
+		"""
+		size = len(self.rows)
+		epoch, position = divmod(draw * self.workers + self.worker, size)
+		if self._permutation is None or self._epoch != epoch:
+			self._permutation = IndexPermutation(size, seed=hash_index(self.seed, epoch))
+			self._epoch = epoch
+		return self._permutation[position]
+
+	def next_row(self):
+		"""
+		Function to draw the next address row.
+
+		Returns:
+			The return value. List containing the address row.
+
+		"""
+		row = self.rows[self.index_at(self.draws)]
+		self.draws += 1
+		return row
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		return self.next_row()
@@ -0,0 +1,322 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :server.py
+#description     :Local HTTP profile service for pyrofilegen.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module serves generated profiles over HTTP so that services written in
+other languages can use realistic Canadian profiles on demand.
+
+A background thread keeps a ring buffer of pre-generated, pre-serialized
+profiles filled, so that requests are answered from the buffer instead of
+waiting on a generation pass. Seeded requests are generated on demand so
+the same seed always returns the same profiles.
+
+Endpoints:
+	-/profile                           One JSON profile.
+	-/profiles?n=&fields=&seed=         JSON list of n profiles.
+	-/stream?n=&fields=&seed=           Chunked newline delimited JSON,
+	                                    unbounded if n is not given.
+
+Usage:
+	python -m pyrofilegen serve --port 8080
+
+Attributes:
+	max_profiles (int): Maximum number of profiles returned by /profiles.
+	generation_lock (threading.Lock): Lock held while generating, as the
+		generators share module level state.
+"""
+
+import collections
+import json
+import threading
+
+try:
+	from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+	from urllib.parse import urlparse, parse_qs
+except ImportError:
+	raise ImportError("pyrofilegen.server requires Python 3.7 or newer.")
+
+from . import pyrofilegen
+
+max_profiles = 100000
+generation_lock = threading.Lock()
+
+class ProfileBuffer(object):
+	"""
+	Ring buffer of pre-generated profiles kept filled by a background thread.
+
+	Args:
+		size: Integer value containing the number of profiles to keep ready. (optional)
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+
+	"""
+
+	def __init__(self, size=1000, variation=False, phone_num_format=5):
+		self.size = size
+		self.variation = variation
+		self.phone_num_format = phone_num_format
+		self._profiles = collections.deque()
+		self._condition = threading.Condition()
+		self._running = False
+		self._thread = None
+
+	def _generate(self):
+		"""
+		Function to generate a single profile and its JSON encoding.
+
+		Returns:
+			The return value. Tuple containing the dict profile and its UTF-8 JSON bytes.
+
+		"""
+		with generation_lock:
+			profile = pyrofilegen.generate_profile(format=3, variation=self.variation, phone_num_format=self.phone_num_format)
+		return (profile, json.dumps(profile).encode("utf-8"))
+
+	def _produce(self):
+		"""
+		Function run by the producer thread to keep the buffer filled.
+
+		"""
+		while True:
+			with self._condition:
+				while self._running and len(self._profiles) >= self.size:
+					self._condition.wait()
+				if not self._running:
+					return
+			entry = self._generate()
+			with self._condition:
+				self._profiles.append(entry)
+				self._condition.notify_all()
+
+	def start(self):
+		"""
+		Function to start the background producer thread.
+
+		"""
+		with self._condition:
+			if self._running:
+				return
+			self._running = True
+		self._thread = threading.Thread(target=self._produce, name="pyrofilegen-producer")
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self):
+		"""
+		Function to stop the background producer thread.
+
+		"""
+		with self._condition:
+			self._running = False
+			self._condition.notify_all()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def take(self, count=1):
+		"""
+		Function to take pre-generated profiles from the buffer.
+
+		Profiles are generated inline when the buffer runs dry.
+
+		Args:
+			count: Integer value containing the number of profiles to take. (optional)
+
+		Returns:
+			The return value. List of (dict profile, JSON bytes) tuples.
+
+		"""
+		entries = []
+		with self._condition:
+			while self._profiles and len(entries) < count:
+				entries.append(self._profiles.popleft())
+			self._condition.notify_all()
+		while len(entries) < count:
+			entries.append(self._generate())
+		return entries
+
+def stream_seeded(count, seed, chunk_size=100, variation=False, phone_num_format=5):
+	"""
+	Function to generate a reproducible sequence of profiles for a seed.
+
+	The state of the random number generators is swapped in and out for
+	every chunk, so seeded requests do not affect the profiles in the buffer
+	or each other.
+
+	Args:
+		count: Integer value containing the number of profiles to generate,
+			unbounded if None.
+		seed: Integer/String value used as the seed.
+		chunk_size: Integer value containing the number of profiles per chunk. (optional)
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+
+	Returns:
+		The return value. Generator yielding lists of (dict profile, JSON bytes) tuples.
+
+	"""
+	state = None
+	generated = 0
+	while count is None or generated < count:
+		size = chunk_size if count is None else min(chunk_size, count - generated)
+		with generation_lock:
+			saved_state = pyrofilegen.get_random_state()
+			try:
+				if state is None:
+					pyrofilegen.seed(seed)
+				else:
+					pyrofilegen.set_random_state(state)
+				profiles = pyrofilegen.generate_profiles(size, format=3, variation=variation, phone_num_format=phone_num_format)
+				state = pyrofilegen.get_random_state()
+			finally:
+				pyrofilegen.set_random_state(saved_state)
+		generated += size
+		yield [(profile, json.dumps(profile).encode("utf-8")) for profile in profiles]
+
+class ProfileRequestHandler(BaseHTTPRequestHandler):
+	"""
+	Request handler for the profile endpoints.
+
+	"""
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+	def _send(self, status, body, content_type="application/json"):
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _send_error(self, status, message):
+		self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+	def _encode(self, entries, fields):
+		"""
+		Function to get the JSON encodings of profiles, restricted to fields.
+
+		"""
+		if not fields:
+			return [data for profile, data in entries]
+		return [json.dumps(dict((field, profile[field]) for field in fields)).encode("utf-8") for profile, data in entries]
+
+	def _chunks(self, count, seed, chunk_size=100):
+		"""
+		Function to get profiles in chunks, from the buffer unless seeded.
+
+		"""
+		profile_buffer = self.server.profile_buffer
+		if seed is not None:
+			for entries in stream_seeded(count, seed, chunk_size=chunk_size, variation=profile_buffer.variation, phone_num_format=profile_buffer.phone_num_format):
+				yield entries
+			return
+		taken = 0
+		while count is None or taken < count:
+			size = chunk_size if count is None else min(chunk_size, count - taken)
+			yield profile_buffer.take(size)
+			taken += size
+
+	def _entries(self, count, seed):
+		entries = []
+		for chunk in self._chunks(count, seed, chunk_size=max(count, 1)):
+			entries.extend(chunk)
+		return entries
+
+	def do_GET(self):
+		url = urlparse(self.path)
+		query = parse_qs(url.query)
+		try:
+			count = int(query["n"][0]) if "n" in query else None
+			if count is not None and count < 0:
+				raise ValueError("n must not be negative")
+			seed = query["seed"][0] if "seed" in query else None
+			if seed is not None and seed.lstrip("-").isdigit():
+				seed = int(seed)
+			fields = [field for field in query["fields"][0].split(",") if field] if "fields" in query else None
+			for field in fields or []:
+				if field not in pyrofilegen.profile_fields:
+					raise ValueError("Unknown profile field: %s" % field)
+		except ValueError as e:
+			return self._send_error(400, str(e))
+
+		if url.path == "/profile":
+			self._send(200, self._encode(self._entries(1, seed), fields)[0])
+		elif url.path == "/profiles":
+			count = 1 if count is None else count
+			if count > max_profiles:
+				return self._send_error(400, "n must not be larger than %s" % max_profiles)
+			self._send(200, b"[" + b",".join(self._encode(self._entries(count, seed), fields)) + b"]")
+		elif url.path == "/stream":
+			self._stream(count, seed, fields)
+		else:
+			self._send_error(404, "Unknown endpoint: %s" % url.path)
+
+	def _stream(self, count, seed, fields):
+		"""
+		Function to stream newline delimited JSON profiles with chunked encoding.
+
+		"""
+		self.send_response(200)
+		self.send_header("Content-Type", "application/x-ndjson")
+		self.send_header("Transfer-Encoding", "chunked")
+		self.end_headers()
+		try:
+			for entries in self._chunks(count, seed):
+				chunk = b"\n".join(self._encode(entries, fields)) + b"\n"
+				self.wfile.write(("%x\r\n" % len(chunk)).encode("ascii") + chunk + b"\r\n")
+			self.wfile.write(b"0\r\n\r\n")
+		except (BrokenPipeError, ConnectionResetError):
+			self.close_connection = True
+
+def make_server(host="127.0.0.1", port=8080, buffer_size=1000, variation=False, phone_num_format=5, verbose=False):
+	"""
+	Function to create the profile HTTP server and start its prefetch buffer.
+
+	The asset tables are loaded into memory first, see load_assets(); tables
+	already installed are kept.
+
+	Args:
+		host: String value containing the interface to bind to. (optional)
+		port: Integer value containing the port to listen on. (optional)
+		buffer_size: Integer value containing the number of profiles to keep ready. (optional)
+		variation: Boolean value indicating whether variation is requested. (optional)
+		phone_num_format: See help(generate_phone_number).
+		verbose: Boolean value indicating whether requests are logged. (optional)
+
+	Returns:
+		The return value. ThreadingHTTPServer ready for serve_forever().
+
+	"""
+	server = ThreadingHTTPServer((host, port), ProfileRequestHandler)
+	server.daemon_threads = True
+	server.verbose = verbose
+	pyrofilegen.load_assets(replace=False)
+	server.profile_buffer = ProfileBuffer(size=buffer_size, variation=variation, phone_num_format=phone_num_format)
+	server.profile_buffer.start()
+	return server
+
+def serve(host="127.0.0.1", port=8080, buffer_size=1000, variation=False, phone_num_format=5, verbose=False):
+	"""
+	Function to run the profile HTTP server until interrupted.
+
+	Args:
+		See help(make_server).
+
+	"""
+	server = make_server(host=host, port=port, buffer_size=buffer_size, variation=variation, phone_num_format=phone_num_format, verbose=verbose)
+	print("Serving profiles on http://%s:%s" % server.server_address[:2])
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.profile_buffer.stop()
+		server.server_close()
@@ -0,0 +1,375 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :shared_assets.py
+#description     :Shared memory asset store for pyrofilegen process pools.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module lets a parent process load the asset tables once into a flat,
+array based layout held in multiprocessing.shared_memory or a memory mapped
+file. Worker processes attach to it without copying or parsing anything,
+so a pool of any size shares a single copy of the data.
+
+Layout (little-endian):
+	-Header: magic, table count
+	-Directory: per table its name, row count, column count and the
+	 positions of its offsets array and string blob
+	-Per table: int64 offsets of every cell into the blob, followed by
+	 the UTF-8 blob of all cells
+
+Rows are decoded on access, so tables behave like read-only sequences
+and can be used with random.choice() directly.
+
+Usage:
+	with shared_assets.publish_assets() as assets:
+		pool = multiprocessing.Pool(64, initializer=shared_assets.attach_assets, initargs=(assets.name,))
+
+Attributes:
+	asset_magic (bytes): Magic bytes at the start of every asset store.
+"""
+
+import mmap
+import os
+import struct
+
+from . import pyrofilegen
+
+try:
+	from multiprocessing import shared_memory
+except ImportError:
+	shared_memory = None
+
+asset_magic = b"PYROFGA1"
+_header = struct.Struct("<8sI")
+_directory_entry = struct.Struct("<16sQQQQ")
+_attached = []
+
+class FlatTable(object):
+	"""
+	Read-only sequence of rows backed by a flat asset store buffer.
+
+	Args:
+		buffer: Buffer containing the asset store.
+		rows: Integer value containing the number of rows.
+		columns: Integer value containing the number of columns.
+		offsets_position: Integer value containing the position of the offsets array.
+		blob_position: Integer value containing the position of the string blob.
+
+	"""
+
+	def __init__(self, buffer, rows, columns, offsets_position, blob_position):
+		view = memoryview(buffer)
+		self.rows = rows
+		self.columns = columns
+		self._offsets = view[offsets_position:offsets_position + 8 * (rows * columns + 1)].cast("q")
+		self._blob = view[blob_position:blob_position + self._offsets[rows * columns]]
+
+	def __len__(self):
+		return self.rows
+
+	def _cell(self, index):
+		return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += self.rows
+		if index < 0 or index >= self.rows:
+			raise IndexError("table index out of range")
+		if self.columns == 1:
+			return self._cell(index)
+		start = index * self.columns
+		return [self._cell(cell) for cell in range(start, start + self.columns)]
+
+	def __iter__(self):
+		for index in range(self.rows):
+			yield self[index]
+
+	def release(self):
+		"""
+		Function to release the views into the underlying buffer.
+
+		"""
+		self._blob.release()
+		self._offsets.release()
+
+def pack_tables(tables):
+	"""
+	Function to pack tables of strings into the flat asset store layout.
+
+	Args:
+		tables: List of (name, rows) tuples, where rows is a sequence of
+			strings or of equally long lists of strings.
+
+	Returns:
+		The return value. Bytes containing the asset store.
+
+	"""
+	packed = []
+	for name, rows in tables:
+		rows = list(rows)
+		columns = 1 if not rows or isinstance(rows[0], str) else len(rows[0])
+		offsets = [0]
+		blob = bytearray()
+		for row in rows:
+			cells = [row] if columns == 1 else row
+			if len(cells) != columns:
+				raise ValueError("Row %r in table %s does not have %s columns" % (row, name, columns))
+			for cell in cells:
+				blob += str(cell).encode("utf-8")
+				offsets.append(len(blob))
+		packed.append((name, len(rows), columns, struct.pack("<%sq" % len(offsets), *offsets), bytes(blob)))
+
+	position = _header.size + _directory_entry.size * len(packed)
+	directory = []
+	for name, rows, columns, offsets, blob in packed:
+		position += -position % 8
+		directory.append(_directory_entry.pack(name.encode("utf-8"), rows, columns, position, position + len(offsets)))
+		position += len(offsets) + len(blob)
+
+	store = bytearray(_header.pack(asset_magic, len(packed)))
+	for entry in directory:
+		store += entry
+	for name, rows, columns, offsets, blob in packed:
+		store += b"\x00" * (-len(store) % 8)
+		store += offsets
+		store += blob
+	return bytes(store)
+
+def unpack_tables(buffer):
+	"""
+	Function to open the tables of an asset store without copying them.
+
+	Args:
+		buffer: Buffer containing the asset store, e.g. shared memory or mmap.
+
+	Returns:
+		The return value. Dict mapping table name to FlatTable.
+
+	"""
+	magic, count = _header.unpack_from(buffer, 0)
+	if magic != asset_magic:
+		raise ValueError("Buffer does not contain a pyrofilegen asset store")
+	tables = {}
+	for i in range(count):
+		name, rows, columns, offsets_position, blob_position = _directory_entry.unpack_from(buffer, _header.size + i * _directory_entry.size)
+		tables[name.rstrip(b"\x00").decode("utf-8")] = FlatTable(buffer, rows, columns, offsets_position, blob_position)
+	return tables
+
+def pack_assets():
+	"""
+	Function to pack the bundled asset files into the flat asset store layout.
+
+	Returns:
+		The return value. Bytes containing the asset store.
+
+	"""
+	area_codes = sorted(pyrofilegen.read_area_codes().items())
+	return pack_tables([
+		("canadian_data", pyrofilegen.read_canadian_data()),
+		("area_codes", [[key, code] for key, code in area_codes]),
+		("companies", pyrofilegen.read_companies()),
+	])
+
+def install_tables(tables):
+	"""
+	Function to make the generators use tables from an asset store.
+
+	The small area code table is converted to a dict for lookups, the
+	address and company tables are used in place.
+
+	Args:
+		tables: Dict mapping table name to FlatTable.
+
+	"""
+	area_codes = None
+	if "area_codes" in tables:
+		area_codes = dict((key, code) for key, code in tables["area_codes"])
+	pyrofilegen.install_assets(canadian_data=tables.get("canadian_data"), area_codes=area_codes, companies=tables.get("companies"))
+
+class SharedAssets(object):
+	"""
+	Asset store published in shared memory by the parent process.
+
+	The shared memory block is unlinked by close(), or on leaving the
+	with block.
+
+	Args:
+		data: Bytes containing the asset store, defaults to pack_assets(). (optional)
+
+	"""
+
+	def __init__(self, data=None):
+		if shared_memory is None:
+			raise ImportError("Shared memory assets require Python 3.8 or newer.")
+		if data is None:
+			data = pack_assets()
+		self._memory = shared_memory.SharedMemory(create=True, size=len(data))
+		self._memory.buf[:len(data)] = data
+		self.name = self._memory.name
+		self.size = len(data)
+
+	def close(self):
+		"""
+		Function to release and unlink the shared memory block.
+
+		"""
+		if self._memory is not None:
+			self._memory.close()
+			self._memory.unlink()
+			self._memory = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+def publish_assets(data=None):
+	"""
+	Function to load the asset tables once into shared memory.
+
+	Args:
+		data: Bytes containing the asset store, defaults to pack_assets(). (optional)
+
+	Returns:
+		The return value. SharedAssets whose name is passed to attach_assets().
+
+	"""
+	return SharedAssets(data)
+
+def attach_assets(name):
+	"""
+	Function to attach to published assets and make the generators use them.
+
+	Suitable as a multiprocessing.Pool initializer. The block stays owned
+	by the publishing parent process, which shares its resource tracker
+	with the pool workers.
+
+	Args:
+		name: String value containing the SharedAssets name.
+
+	Returns:
+		The return value. Dict mapping table name to FlatTable.
+
+	"""
+	if shared_memory is None:
+		raise ImportError("Shared memory assets require Python 3.8 or newer.")
+	memory = shared_memory.SharedMemory(name=name)
+	tables = unpack_tables(memory.buf)
+	install_tables(tables)
+	_attached.append(memory)
+	return tables
+
+def write_asset_file(path, data=None):
+	"""
+	Function to write an asset store to a file for memory mapping.
+
+	Args:
+		path: String value containing the output file path.
+		data: Bytes containing the asset store, defaults to pack_assets(). (optional)
+
+	"""
+	if data is None:
+		data = pack_assets()
+	with open(path, "wb") as f:
+		f.write(data)
+
+class TableFileWriter(object):
+	"""
+	Streaming writer of a single table asset store file.
+
+	Rows are appended to temporary offset and blob files, so tables larger
+	than memory can be written. The store is assembled by close().
+
+	Args:
+		path: String value containing the output file path.
+		name: String value containing the table name.
+		columns: Integer value containing the number of columns per row.
+
+	"""
+
+	def __init__(self, path, name, columns):
+		self.path = path
+		self.name = name
+		self.columns = columns
+		self.rows = 0
+		self._blob_size = 0
+		self._offsets = open(path + ".offsets.tmp", "w+b")
+		self._blob = open(path + ".blob.tmp", "w+b")
+		self._offsets.write(struct.pack("<q", 0))
+
+	def write_row(self, row):
+		"""
+		Function to append a row.
+
+		Args:
+			row: List of strings with one value per column.
+
+		"""
+		if len(row) != self.columns:
+			raise ValueError("Row %r does not have %s columns" % (row, self.columns))
+		offsets = []
+		for cell in row:
+			data = str(cell).encode("utf-8")
+			self._blob.write(data)
+			self._blob_size += len(data)
+			offsets.append(self._blob_size)
+		self._offsets.write(struct.pack("<%sq" % self.columns, *offsets))
+		self.rows += 1
+
+	def close(self, block_size=1 << 20):
+		"""
+		Function to assemble the asset store file and remove the temporary files.
+
+		The store is written next to the output path and moved into place
+		once it is complete.
+
+		"""
+		offsets_size = 8 * (self.rows * self.columns + 1)
+		offsets_position = _header.size + _directory_entry.size
+		offsets_position += -offsets_position % 8
+		temp_path = self.path + ".tmp"
+		with open(temp_path, "wb") as f:
+			f.write(_header.pack(asset_magic, 1))
+			f.write(_directory_entry.pack(self.name.encode("utf-8"), self.rows, self.columns, offsets_position, offsets_position + offsets_size))
+			f.write(b"\x00" * (offsets_position - f.tell()))
+			for temp in (self._offsets, self._blob):
+				temp.seek(0)
+				block = temp.read(block_size)
+				while block:
+					f.write(block)
+					block = temp.read(block_size)
+		os.replace(temp_path, self.path)
+		self.discard()
+
+	def discard(self):
+		"""
+		Function to remove the temporary files without writing the asset store.
+
+		"""
+		for temp in (self._offsets, self._blob):
+			temp.close()
+			if os.path.exists(temp.name):
+				os.remove(temp.name)
+
+def open_asset_file(path):
+	"""
+	Function to memory map an asset store file and make the generators use it.
+
+	Processes mapping the same file share its pages through the page cache.
+
+	Args:
+		path: String value containing the asset store file path.
+
+	Returns:
+		The return value. Dict mapping table name to FlatTable.
+
+	"""
+	with open(path, "rb") as f:
+		mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+	tables = unpack_tables(mapping)
+	install_tables(tables)
+	_attached.append(mapping)
+	return tables
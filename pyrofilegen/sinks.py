@@ -0,0 +1,397 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :sinks.py
+#description     :Bulk database and file sinks for generated pyrofilegen profiles.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module allows generated profiles to be loaded directly into a database
+or columnar file without going through intermediate CSV text first.
+
+Sinks accept any iterable of profiles, either in the dict format
+(generate_profile(format=3)) or the list format (generate_profile(format=2)),
+and consume it in batches so that arbitrarily large streams from
+stream_profiles() are loaded with bounded memory. The table schema is derived
+from pyrofilegen.profile_fields.
+
+Supported sinks:
+	-SQLite (executemany inside large transactions)
+	-PostgreSQL COPY ... FROM STDIN (text or binary stream)
+	-Parquet and Arrow IPC files (requires pyarrow)
+
+Attributes:
+	pg_copy_signature (bytes): Header signature of the PostgreSQL binary
+		COPY format.
+	dictionary_fields (list): Low cardinality profile fields that are
+		dictionary encoded in Arrow/Parquet output.
+"""
+
+import struct
+import sqlite3
+from itertools import islice
+
+from . import pyrofilegen
+
+try:
+	import pyarrow
+	import pyarrow.ipc
+	import pyarrow.parquet
+except ImportError:
+	pyarrow = None
+
+pg_copy_signature = b"PGCOPY\n\xff\r\n\x00"
+dictionary_fields = ["gender", "dob_year", "dob_month", "dob_day", "height", "city", "province", "credit_card_expiry", "company", "astrological_sign"]
+
+def _batches(profiles, fields, batch_size):
+	"""
+	Function to group profiles into batches of value tuples.
+
+	Args:
+		profiles: Iterable of dict or list profiles.
+		fields: List of field keys to extract from each profile.
+		batch_size: Integer value containing the number of rows per batch.
+
+	Returns:
+		The return value. Generator yielding lists of row tuples.
+
+	"""
+	positions = [pyrofilegen.profile_fields.index(field) for field in fields]
+	iterator = iter(profiles)
+	while True:
+		batch = list(islice(iterator, batch_size))
+		if not batch:
+			return
+		rows = []
+		for profile in batch:
+			if isinstance(profile, dict):
+				rows.append(tuple([profile.get(field) for field in fields]))
+			else:
+				rows.append(tuple([profile[i] if i < len(profile) else None for i in positions]))
+		yield rows
+
+def _check_fields(fields):
+	"""
+	Function to validate the requested profile fields.
+
+	Args:
+		fields: List of field keys, defaults to every profile field. (optional)
+
+	Returns:
+		The return value. List containing the validated field keys.
+
+	"""
+	if not fields:
+		return list(pyrofilegen.profile_fields)
+	for field in fields:
+		if field not in pyrofilegen.profile_fields:
+			raise ValueError("Unknown profile field: %s" % field)
+	return list(fields)
+
+def _quote_identifier(name):
+	"""
+	Function to quote a SQL identifier.
+
+	Args:
+		name: String value containing the table or column name.
+
+	Returns:
+		The return value. String value containing the quoted identifier.
+
+	"""
+	return '"%s"' % str(name).replace('"', '""')
+
+def create_table_sql(table_name="profiles", fields=None):
+	"""
+	Function to build the CREATE TABLE statement for the profile schema.
+
+	Args:
+		table_name: String value containing the name of the table. (optional)
+		fields: List of field keys, defaults to every profile field. (optional)
+
+	Returns:
+		The return value. String value containing the CREATE TABLE statement.
+
+	"""
+	fields = _check_fields(fields)
+	columns = ", ".join(["%s TEXT" % _quote_identifier(field) for field in fields])
+	return "CREATE TABLE IF NOT EXISTS %s (%s)" % (_quote_identifier(table_name), columns)
+
+def write_sqlite(profiles, database, table_name="profiles", fields=None, batch_size=50000, fast=True):
+	"""
+	Function to bulk load profiles into a SQLite database.
+
+	Each batch is inserted with a single prepared INSERT statement through
+	executemany, and batches are committed in one transaction each. If the
+	connection passed in already has an open transaction, the rows are
+	inserted into it instead, nothing is committed or rolled back and the
+	pragmas are left alone; committing is then up to the caller.
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		database: String value containing the database path, or an open
+			sqlite3.Connection.
+		table_name: String value containing the name of the table. (optional)
+		fields: List of field keys, defaults to every profile field. (optional)
+		batch_size: Integer value containing the number of rows per transaction. (optional)
+		fast: Boolean value indicating whether durability pragmas should be
+			relaxed for the duration of the load; their previous values are
+			restored afterwards. (optional)
+
+	Returns:
+		The return value. Integer value containing the number of rows written.
+
+	"""
+	fields = _check_fields(fields)
+	if isinstance(database, sqlite3.Connection):
+		connection = database
+		close = False
+	else:
+		connection = sqlite3.connect(database)
+		close = True
+	statement = "INSERT INTO %s (%s) VALUES (%s)" % (_quote_identifier(table_name), ", ".join([_quote_identifier(field) for field in fields]), ", ".join(["?"] * len(fields)))
+	rows_written = 0
+	owned = not connection.in_transaction
+	synchronous = journal_mode = None
+	try:
+		if fast and owned:
+			synchronous = connection.execute("PRAGMA synchronous").fetchone()[0]
+			journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+			connection.execute("PRAGMA synchronous = OFF")
+			connection.execute("PRAGMA journal_mode = MEMORY")
+		connection.execute(create_table_sql(table_name, fields))
+		for rows in _batches(profiles, fields, batch_size):
+			if owned:
+				with connection:
+					connection.executemany(statement, rows)
+			else:
+				connection.executemany(statement, rows)
+			rows_written += len(rows)
+	finally:
+		if synchronous is not None and not connection.in_transaction:
+			connection.execute("PRAGMA journal_mode = %s" % journal_mode)
+			connection.execute("PRAGMA synchronous = %d" % synchronous)
+		if close:
+			connection.close()
+	return rows_written
+
+def pg_copy_statement(table_name="profiles", fields=None, format="text"):
+	"""
+	Function to build the COPY statement matching write_pg_copy() output.
+
+	Args:
+		table_name: String value containing the name of the table. (optional)
+		fields: List of field keys, defaults to every profile field. (optional)
+		format: String value, either "text" or "binary". (optional)
+
+	Returns:
+		The return value. String value containing the COPY statement.
+
+	"""
+	fields = _check_fields(fields)
+	columns = ", ".join([_quote_identifier(field) for field in fields])
+	if format == "binary":
+		return "COPY %s (%s) FROM STDIN WITH (FORMAT binary)" % (_quote_identifier(table_name), columns)
+	elif format == "text":
+		return "COPY %s (%s) FROM STDIN" % (_quote_identifier(table_name), columns)
+	else:
+		raise ValueError("Unknown COPY format: %s" % format)
+
+def _pg_escape_text(value):
+	"""
+	Function to escape a single value for the PostgreSQL COPY text format.
+
+	Args:
+		value: Value to escape, None is written as NULL.
+
+	Returns:
+		The return value. String value containing the escaped value.
+
+	"""
+	if value is None:
+		return "\\N"
+	value = str(value)
+	if "\\" in value:
+		value = value.replace("\\", "\\\\")
+	if "\t" in value or "\n" in value or "\r" in value:
+		value = value.replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+	return value
+
+def write_pg_copy(profiles, stream, fields=None, format="text", batch_size=50000):
+	"""
+	Function to write profiles as a PostgreSQL COPY ... FROM STDIN stream.
+
+	The output can be piped into psql or passed to a driver's copy API
+	together with pg_copy_statement().
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		stream: Binary file-like object the COPY data is written to.
+		fields: List of field keys, defaults to every profile field. (optional)
+		format: String value, either "text" or "binary". (optional)
+		batch_size: Integer value containing the number of rows per write. (optional)
+
+	Returns:
+		The return value. Integer value containing the number of rows written.
+
+	"""
+	fields = _check_fields(fields)
+	rows_written = 0
+	if format == "text":
+		for rows in _batches(profiles, fields, batch_size):
+			lines = ["\t".join([_pg_escape_text(value) for value in row]) for row in rows]
+			stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+			rows_written += len(rows)
+	elif format == "binary":
+		stream.write(pg_copy_signature + struct.pack("!ii", 0, 0))
+		tuple_header = struct.pack("!h", len(fields))
+		null_field = struct.pack("!i", -1)
+		for rows in _batches(profiles, fields, batch_size):
+			chunk = bytearray()
+			for row in rows:
+				chunk += tuple_header
+				for value in row:
+					if value is None:
+						chunk += null_field
+					else:
+						data = str(value).encode("utf-8")
+						chunk += struct.pack("!i", len(data))
+						chunk += data
+			stream.write(bytes(chunk))
+			rows_written += len(rows)
+		stream.write(struct.pack("!h", -1))
+	else:
+		raise ValueError("Unknown COPY format: %s" % format)
+	return rows_written
+
+def _require_pyarrow():
+	"""
+	Function to raise an informative error when pyarrow is not installed.
+
+	"""
+	if pyarrow is None:
+		raise ImportError("Arrow and Parquet output requires pyarrow, install it with: pip install pyarrow")
+
+def arrow_schema(fields=None):
+	"""
+	Function to build the Arrow schema for the profile fields.
+
+	Args:
+		fields: List of field keys, defaults to every profile field. (optional)
+
+	Returns:
+		The return value. pyarrow.Schema with string columns, dictionary
+		encoded for the fields in dictionary_fields.
+
+	"""
+	_require_pyarrow()
+	fields = _check_fields(fields)
+	dictionary_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+	return pyarrow.schema([pyarrow.field(field, dictionary_type if field in dictionary_fields else pyarrow.string()) for field in fields])
+
+def arrow_record_batches(profiles, fields=None, batch_size=100000):
+	"""
+	Function to build Arrow record batches column by column from profiles.
+
+	Dictionary encoded columns share one growing dictionary across batches,
+	so later batches only add new values.
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		fields: List of field keys, defaults to every profile field. (optional)
+		batch_size: Integer value containing the number of rows per batch. (optional)
+
+	Returns:
+		The return value. Generator yielding pyarrow.RecordBatch.
+
+	"""
+	schema = arrow_schema(fields)
+	fields = schema.names
+	dictionaries = dict((field, ({}, [])) for field in fields if field in dictionary_fields)
+	for rows in _batches(profiles, fields, batch_size):
+		arrays = []
+		for field, column in zip(fields, zip(*rows)):
+			if field in dictionaries:
+				lookup, values = dictionaries[field]
+				indices = []
+				for value in column:
+					if value is None:
+						indices.append(None)
+						continue
+					index = lookup.get(value)
+					if index is None:
+						index = lookup[value] = len(values)
+						values.append(value)
+					indices.append(index)
+				arrays.append(pyarrow.DictionaryArray.from_arrays(pyarrow.array(indices, type=pyarrow.int32()), pyarrow.array(values, type=pyarrow.string())))
+			else:
+				arrays.append(pyarrow.array(column, type=pyarrow.string()))
+		yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+def write_parquet(profiles, path, fields=None, row_group_size=1000000, compression="snappy", batch_size=65536):
+	"""
+	Function to stream profiles into a Parquet file, one row group at a time.
+
+	Profiles are converted into record batches of batch_size rows, which are
+	buffered as Arrow data until they fill a row group. Only one row group
+	is held in memory at a time.
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		path: String value containing the output file path.
+		fields: List of field keys, defaults to every profile field. (optional)
+		row_group_size: Integer value containing the number of rows per row group. (optional)
+		compression: String value containing the Parquet compression codec. (optional)
+		batch_size: Integer value containing the number of rows per record batch. (optional)
+
+	Returns:
+		The return value. Integer value containing the number of rows written.
+
+	"""
+	schema = arrow_schema(fields)
+	rows_written = 0
+	writer = pyarrow.parquet.ParquetWriter(path, schema, compression=compression, use_dictionary=[field for field in schema.names if field in dictionary_fields])
+	try:
+		buffered = []
+		buffered_rows = 0
+		for batch in arrow_record_batches(profiles, fields=schema.names, batch_size=min(batch_size, row_group_size)):
+			buffered.append(batch)
+			buffered_rows += batch.num_rows
+			rows_written += batch.num_rows
+			if buffered_rows >= row_group_size:
+				table = pyarrow.Table.from_batches(buffered, schema=schema)
+				writer.write_table(table.slice(0, row_group_size), row_group_size=row_group_size)
+				buffered = table.slice(row_group_size).to_batches()
+				buffered_rows -= row_group_size
+		if buffered_rows:
+			writer.write_table(pyarrow.Table.from_batches(buffered, schema=schema), row_group_size=row_group_size)
+	finally:
+		writer.close()
+	return rows_written
+
+def write_arrow_ipc(profiles, path, fields=None, batch_size=100000):
+	"""
+	Function to stream profiles into an Arrow IPC (Feather v2) file.
+
+	Args:
+		profiles: Iterable of dict or list profiles, e.g. stream_profiles(format=3).
+		path: String value containing the output file path.
+		fields: List of field keys, defaults to every profile field. (optional)
+		batch_size: Integer value containing the number of rows per record batch. (optional)
+
+	Returns:
+		The return value. Integer value containing the number of rows written.
+
+	"""
+	schema = arrow_schema(fields)
+	rows_written = 0
+	with pyarrow.OSFile(path, "wb") as sink:
+		writer = pyarrow.ipc.new_file(sink, schema, options=pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+		try:
+			for batch in arrow_record_batches(profiles, fields=schema.names, batch_size=batch_size):
+				writer.write_batch(batch)
+				rows_written += batch.num_rows
+		finally:
+			writer.close()
+	return rows_written
@@ -0,0 +1,453 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :sketches.py
+#description     :Streaming data quality sketches for pyrofilegen bulk runs.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+
+This module summarizes profiles while they are generated, so the quality of
+a bulk run can be checked without scanning its output a second time:
+
+	-HyperLogLog distinct counts (and so duplicate rates) of emails, SINs
+	 and credit cards
+	-Count-min heavy hitter tables of names, streets, cities, provinces and
+	 email domains
+	-Exact histograms of the year of birth, height and weight
+
+Every sketch has a fixed size and can be merged with the sketches of other
+workers, as long as they were created with the same settings.
+
+Usage:
+	>>sketch = sketches.ProfileSketch()
+	>>profiles = pyrofilegen.generate_profiles(100000, format=3, sketch=sketch)
+	>>sketch.write_report('profiles.csv.sketch.json')
+	>>merged = sketches.merge_reports(['worker0.sketch.json', 'worker1.sketch.json'])
+
+Attributes:
+	distinct_fields (list): Profile fields counted with HyperLogLog.
+	top_fields (list): Profile fields tracked with heavy hitter tables.
+	histogram_fields (dict): Dict mapping the histogram fields to their bucket width.
+"""
+
+import base64
+import hashlib
+import json
+import math
+from array import array
+
+from . import pyrofilegen
+
+distinct_fields = ["email", "sin", "credit_card"]
+top_fields = ["first_name", "last_name", "street_name", "city", "province", "email_domain"]
+histogram_fields = {"dob_year": 1, "height": 1, "weight": 5}
+
+def _hash64(value):
+	"""
+	Function to hash a value into a 64-bit integer.
+
+	"""
+	return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "little")
+
+def _encode_array(values):
+	return base64.b64encode(values.tobytes()).decode("ascii")
+
+def _decode_array(typecode, data):
+	values = array(typecode)
+	values.frombytes(base64.b64decode(data))
+	return values
+
+class HyperLogLog(object):
+	"""
+	Distinct count estimate in fixed memory.
+
+	Args:
+		precision: Integer value between 4 and 18; the sketch has 2**precision
+			registers and a standard error of about 1.04 / sqrt(2**precision). (optional)
+
+	"""
+
+	def __init__(self, precision=14):
+		if not 4 <= precision <= 18:
+			raise ValueError("precision must be between 4 and 18")
+		self.precision = precision
+		self.registers = bytearray(1 << precision)
+
+	def add(self, value):
+		"""
+		Function to add a value.
+
+		"""
+		h = _hash64(value)
+		bits = 64 - self.precision
+		index = h >> bits
+		rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+		if rank > self.registers[index]:
+			self.registers[index] = rank
+
+	def count(self):
+		"""
+		Function to estimate the number of distinct values added.
+
+		Returns:
+			The return value. Integer value containing the estimate.
+
+		"""
+		m = len(self.registers)
+		estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -register for register in self.registers)
+		zeros = self.registers.count(0)
+		if estimate <= 2.5 * m and zeros:
+			estimate = m * math.log(float(m) / zeros)
+		return int(round(estimate))
+
+	def merge(self, other):
+		"""
+		Function to merge another sketch with the same precision into this one.
+
+		"""
+		if other.precision != self.precision:
+			raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+		self.registers = bytearray(map(max, self.registers, other.registers))
+
+	def to_dict(self):
+		return {"precision": self.precision, "registers": base64.b64encode(bytes(self.registers)).decode("ascii")}
+
+	@classmethod
+	def from_dict(cls, data):
+		sketch = cls(data["precision"])
+		sketch.registers = bytearray(base64.b64decode(data["registers"]))
+		return sketch
+
+class HeavyHitters(object):
+	"""
+	Count-min sketch tracking the most frequent values.
+
+	Counts are overestimated by at most about 2 / width of the total with
+	high probability, and never underestimated.
+
+	Args:
+		k: Integer value containing the number of top values reported. (optional)
+		width: Integer value containing the number of counters per row. (optional)
+		depth: Integer value containing the number of rows. (optional)
+
+	"""
+
+	def __init__(self, k=20, width=2048, depth=4):
+		self.k = k
+		self.width = width
+		self.depth = depth
+		self.total = 0
+		self.table = array("Q", bytes(8 * width * depth))
+		self.candidates = {}
+		self._floor = 0
+
+	def _estimate(self, h):
+		h1 = h & 0xFFFFFFFF
+		h2 = h >> 32
+		width = self.width
+		return min(self.table[row * width + (h1 + row * h2) % width] for row in range(self.depth))
+
+	def add(self, value, count=1):
+		"""
+		Function to add occurrences of a value.
+
+		"""
+		h = _hash64(value)
+		h1 = h & 0xFFFFFFFF
+		h2 = h >> 32
+		width = self.width
+		table = self.table
+		estimate = None
+		for row in range(self.depth):
+			position = row * width + (h1 + row * h2) % width
+			table[position] += count
+			if estimate is None or table[position] < estimate:
+				estimate = table[position]
+		self.total += count
+		candidates = self.candidates
+		if value in candidates or len(candidates) < 2 * self.k:
+			candidates[value] = estimate
+		elif estimate > self._floor:
+			smallest = min(candidates, key=candidates.get)
+			self._floor = candidates[smallest]
+			if estimate > self._floor:
+				del candidates[smallest]
+				candidates[value] = estimate
+
+	def estimate(self, value):
+		"""
+		Function to estimate the number of occurrences of a value.
+
+		"""
+		return self._estimate(_hash64(value))
+
+	def top(self):
+		"""
+		Function to get the most frequent values.
+
+		Returns:
+			The return value. List of (value, estimated count) tuples, most frequent first.
+
+		"""
+		estimates = [(value, self.estimate(value)) for value in self.candidates]
+		return sorted(estimates, key=lambda item: (-item[1], item[0]))[:self.k]
+
+	def merge(self, other):
+		"""
+		Function to merge another sketch with the same width and depth into this one.
+
+		"""
+		if (other.width, other.depth) != (self.width, self.depth):
+			raise ValueError("Cannot merge heavy hitter sketches of different size")
+		self.table = array("Q", map(sum, zip(self.table, other.table)))
+		self.total += other.total
+		values = set(self.candidates) | set(other.candidates)
+		estimates = dict((value, self.estimate(value)) for value in values)
+		self.candidates = dict(sorted(estimates.items(), key=lambda item: (-item[1], item[0]))[:2 * self.k])
+		self._floor = 0
+
+	def to_dict(self):
+		return {"k": self.k, "width": self.width, "depth": self.depth, "total": self.total, "table": _encode_array(self.table), "candidates": self.candidates}
+
+	@classmethod
+	def from_dict(cls, data):
+		sketch = cls(data["k"], data["width"], data["depth"])
+		sketch.total = data["total"]
+		sketch.table = _decode_array("Q", data["table"])
+		sketch.candidates = dict(data["candidates"])
+		return sketch
+
+class Histogram(object):
+	"""
+	Exact histogram of numeric values in fixed width buckets.
+
+	Args:
+		width: Integer value containing the bucket width. (optional)
+
+	"""
+
+	def __init__(self, width=1):
+		self.width = width
+		self.buckets = {}
+		self.count = 0
+		self.sum = 0
+
+	def add(self, value):
+		"""
+		Function to add a value.
+
+		"""
+		bucket = value // self.width * self.width
+		self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+		self.count += 1
+		self.sum += value
+
+	def merge(self, other):
+		"""
+		Function to merge another histogram with the same bucket width into this one.
+
+		"""
+		if other.width != self.width:
+			raise ValueError("Cannot merge histograms of different bucket width")
+		for bucket, count in other.buckets.items():
+			self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+		self.count += other.count
+		self.sum += other.sum
+
+	def summary(self):
+		"""
+		Function to summarize the histogram.
+
+		Returns:
+			The return value. Dict containing the count, min, max, mean and buckets.
+
+		"""
+		if not self.count:
+			return {"count": 0, "buckets": {}}
+		buckets = sorted(self.buckets)
+		return {"count": self.count, "min": buckets[0], "max": buckets[-1] + self.width - 1, "mean": round(float(self.sum) / self.count, 3), "buckets": dict((str(bucket), self.buckets[bucket]) for bucket in buckets)}
+
+	def to_dict(self):
+		return {"width": self.width, "buckets": dict((str(bucket), count) for bucket, count in self.buckets.items()), "count": self.count, "sum": self.sum}
+
+	@classmethod
+	def from_dict(cls, data):
+		sketch = cls(data["width"])
+		sketch.buckets = dict((int(bucket), count) for bucket, count in data["buckets"].items())
+		sketch.count = data["count"]
+		sketch.sum = data["sum"]
+		return sketch
+
+def _field_number(field, value):
+	"""
+	Function to convert a histogram field value into a number.
+
+	"""
+	value = str(value)
+	if field == "height":
+		feet, _, inches = value.partition("'")
+		return int(feet) * 12 + int(inches or 0)
+	return int(value.split()[0])
+
+class ProfileSketch(object):
+	"""
+	Set of sketches summarizing a stream of profiles.
+
+	Args:
+		precision: See help(HyperLogLog). (optional)
+		k: See help(HeavyHitters). (optional)
+		width: See help(HeavyHitters). (optional)
+		depth: See help(HeavyHitters). (optional)
+
+	"""
+
+	def __init__(self, precision=14, k=20, width=2048, depth=4):
+		self.profiles = 0
+		self.distinct = dict((field, HyperLogLog(precision)) for field in distinct_fields)
+		self.top = dict((field, HeavyHitters(k, width, depth)) for field in top_fields)
+		self.histograms = dict((field, Histogram(bucket_width)) for field, bucket_width in histogram_fields.items())
+
+	def update(self, profile):
+		"""
+		Function to add a profile to the sketches.
+
+		Args:
+			profile: List or Dict profile, as generated with format 2 or 3.
+
+		"""
+		if isinstance(profile, list):
+			profile = dict(zip(pyrofilegen.profile_fields, profile))
+		elif not isinstance(profile, dict):
+			raise ValueError("Only list and dict profiles (format 2 and 3) can be sketched")
+		self.profiles += 1
+		for field, sketch in self.distinct.items():
+			if field in profile:
+				sketch.add(profile[field])
+		for field, sketch in self.top.items():
+			if field == "email_domain":
+				if "email" in profile:
+					sketch.add(str(profile["email"]).rpartition("@")[2])
+			elif field in profile:
+				sketch.add(profile[field])
+		for field, sketch in self.histograms.items():
+			if field in profile:
+				sketch.add(_field_number(field, profile[field]))
+
+	def merge(self, other):
+		"""
+		Function to merge the sketches of another worker into this one.
+
+		"""
+		self.profiles += other.profiles
+		for group in ("distinct", "top", "histograms"):
+			sketches = getattr(self, group)
+			for field, sketch in getattr(other, group).items():
+				if field in sketches:
+					sketches[field].merge(sketch)
+				else:
+					sketches[field] = sketch
+
+	def report(self):
+		"""
+		Function to summarize the sketches.
+
+		Returns:
+			The return value. Dict containing the number of profiles, the
+			estimated distinct counts and duplicate rates, the most frequent
+			values and the histograms.
+
+		"""
+		distinct = {}
+		for field, sketch in self.distinct.items():
+			estimate = min(sketch.count(), self.profiles)
+			distinct[field] = {"estimate": estimate, "duplicate_rate": round(1 - float(estimate) / self.profiles, 6) if self.profiles else 0.0}
+		top = dict((field, [[value, count] for value, count in sketch.top()]) for field, sketch in self.top.items())
+		histograms = dict((field, sketch.summary()) for field, sketch in self.histograms.items())
+		return {"profiles": self.profiles, "distinct": distinct, "top": top, "histograms": histograms}
+
+	def to_dict(self):
+		"""
+		Function to convert the sketches into JSON compatible data.
+
+		"""
+		return {
+			"profiles": self.profiles,
+			"distinct": dict((field, sketch.to_dict()) for field, sketch in self.distinct.items()),
+			"top": dict((field, sketch.to_dict()) for field, sketch in self.top.items()),
+			"histograms": dict((field, sketch.to_dict()) for field, sketch in self.histograms.items()),
+		}
+
+	@classmethod
+	def from_dict(cls, data):
+		"""
+		Function to restore sketches from the data of to_dict().
+
+		"""
+		sketch = cls()
+		sketch.profiles = data["profiles"]
+		sketch.distinct = dict((field, HyperLogLog.from_dict(value)) for field, value in data["distinct"].items())
+		sketch.top = dict((field, HeavyHitters.from_dict(value)) for field, value in data["top"].items())
+		sketch.histograms = dict((field, Histogram.from_dict(value)) for field, value in data["histograms"].items())
+		return sketch
+
+	def write_report(self, path):
+		"""
+		Function to write the JSON report, including the mergeable sketch state.
+
+		Args:
+			path: String value containing the report file path.
+
+		"""
+		with open(path, "w") as f:
+			json.dump({"report": self.report(), "state": self.to_dict()}, f, indent=1)
+
+def report_path_for(output):
+	"""
+	Function to get the default sketch report path of an output file.
+
+	Args:
+		output: String value containing the output file path.
+
+	Returns:
+		The return value. String value containing the report file path.
+
+	"""
+	return output + ".sketch.json"
+
+def read_report(path):
+	"""
+	Function to read the sketches of a JSON report.
+
+	Args:
+		path: String value containing the report file path.
+
+	Returns:
+		The return value. ProfileSketch.
+
+	"""
+	with open(path) as f:
+		return ProfileSketch.from_dict(json.load(f)["state"])
+
+def merge_reports(paths, output=None):
+	"""
+	Function to merge the JSON reports of parallel workers.
+
+	Args:
+		paths: List of report file paths.
+		output: String value containing the path of the merged report. (optional)
+
+	Returns:
+		The return value. ProfileSketch containing the merged sketches.
+
+	"""
+	merged = None
+	for path in paths:
+		sketch = read_report(path)
+		if merged is None:
+			merged = sketch
+		else:
+			merged.merge(sketch)
+	if merged is not None and output:
+		merged.write_report(output)
+	return merged
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_addresses.py
+#description     :Tests of the synthetic address expansion.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import re
+import unittest
+
+from pyrofilegen import addresses
+
+rows = [
+	["43.6500000", "-79.3800000", "10", "King St W", "Toronto", "Ontario", "M5H 1A1"],
+	["43.6510000", "-79.3810000", "14", "King St W", "Toronto", "Ontario", "M5H 1A2"],
+	["45.4200000", "-75.7000000", "3", "Main St", "Ottawa", "Ontario", "K1A 0B1"],
+	["45.4200000", "-75.7000000", "", "No Number Rd", "Ottawa", "Ontario", "K1A 0B1"],
+]
+
+class AddressExpanderTest(unittest.TestCase):
+
+	def setUp(self):
+		self.expander = addresses.AddressExpander(seed=7, rows=rows, min_spread=3)
+
+	def test_distinct_addresses(self):
+		count = self.expander.capacity * (len(addresses.street_number_suffixes) + 3)
+		expanded = [tuple(self.expander[i][2:6]) for i in range(count)]
+		self.assertEqual(len(set(expanded)), count)
+		self.assertEqual(set(row[1] for row in expanded), set(["King St W", "Main St"]))
+
+	def test_street_number_forms(self):
+		capacity = self.expander.capacity
+		self.assertTrue(all(row[2].isdigit() for row in self.expander.rows_from(0, capacity)))
+		self.assertTrue(all(re.match(r"^[0-9]+A$", row[2]) for row in self.expander.rows_from(capacity, capacity)))
+		units = list(self.expander.rows_from(capacity * (len(addresses.street_number_suffixes) + 1), capacity))
+		self.assertTrue(all(re.match(r"^Unit 1 - [0-9]+$", row[2]) for row in units))
+
+	def test_rows_are_derived_from_the_index(self):
+		other = addresses.AddressExpander(seed=7, rows=rows, min_spread=3)
+		self.assertEqual([other[i] for i in range(100, 0, -7)], [self.expander[i] for i in range(100, 0, -7)])
+		for row in self.expander.rows_from(0, 50):
+			self.assertRegex(row[6], r"^[KM][0-9][A-Z] [0-9][A-Z][0-9]$")
+		with self.assertRaises(IndexError):
+			self.expander[-1]
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_distributions.py
+#description     :Tests of the configurable demographic distributions.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import random
+import unittest
+
+from pyrofilegen import distributions, pyrofilegen
+
+class AliasTableTest(unittest.TestCase):
+
+	def test_frequencies(self):
+		weights = {"a": 1, "b": 2, "c": 3, "d": 0, "e": 14}
+		table = distributions.AliasTable(weights)
+		generator_state = random.getstate()
+		random.seed(4)
+		try:
+			draws = [table.draw() for _ in range(100000)]
+		finally:
+			random.setstate(generator_state)
+		total = float(sum(weights.values()))
+		for value, weight in weights.items():
+			self.assertAlmostEqual(draws.count(value) / 100000.0, weight / total, delta=0.01, msg=value)
+
+	def test_invalid_weights(self):
+		with self.assertRaises(ValueError):
+			distributions.AliasTable([])
+		with self.assertRaises(ValueError):
+			distributions.AliasTable([0, 0])
+
+class DemographicsTest(unittest.TestCase):
+
+	def tearDown(self):
+		pyrofilegen.set_demographics(None)
+		pyrofilegen.uninstall_assets()
+
+	def test_company_table_is_built_once(self):
+		demographics = distributions.Demographics(company_weights={"Acme": 1000})
+		pyrofilegen.set_demographics(demographics)
+		table = demographics._company_table
+		with pyrofilegen.seeded(2):
+			companies = [pyrofilegen.generate_company() for _ in range(2000)]
+		self.assertIs(demographics._company_table, table)
+		self.assertEqual(len(demographics._companies), len(pyrofilegen.read_companies()))
+		pyrofilegen.install_assets(companies=["Acme", "Other"])
+		self.assertIsNot(demographics._company_table, table)
+		with pyrofilegen.seeded(2):
+			companies = [pyrofilegen.generate_company() for _ in range(2000)]
+		self.assertAlmostEqual(companies.count("Acme") / 2000.0, 1000 / 1001.0, delta=0.01)
+		pyrofilegen.uninstall_assets()
+		self.assertEqual(len(demographics._companies), len(pyrofilegen.read_companies()))
+
+	def test_reference_year(self):
+		demographics = distributions.Demographics(reference_year=2000)
+		with pyrofilegen.seeded(3):
+			years = [demographics.dob_year() for _ in range(1000)]
+		self.assertTrue(all(1910 <= year <= 1982 for year in years))
+
+if __name__ == "__main__":
+	unittest.main()
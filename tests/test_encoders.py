@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_encoders.py
+#description     :Tests of the fast CSV, TSV and text profile output.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import csv
+import io
+import unittest
+
+from pyrofilegen import encoders, pyrofilegen
+
+class EncoderTest(unittest.TestCase):
+
+	def setUp(self):
+		with pyrofilegen.seeded(11):
+			self.profiles = list(pyrofilegen.stream_profiles(50, format=3))
+		tricky = [
+			{"first_name": 'Jo "JJ" Ann', "city": "Sault Ste. Marie, ON", "street_name": "Main\tStreet"},
+			{"last_name": "O'Neil\nSmith", "company": "Acme\r\nInc", "email": None},
+			{"first_name": "Nonee", "last_name": "NoneSuch", "company": "None"},
+			{"maiden_name": "", "postal_code": '"', "lat_long": "43.1 -79.2"},
+			{"password": "a,b\"c\td\ne", "height": None, "sin": "%s %d"},
+		]
+		for i, changes in enumerate(tricky):
+			profile = dict(self.profiles[10 * i + 3])
+			profile.update(changes)
+			self.profiles[10 * i + 3] = profile
+
+	def lists(self):
+		return [[profile.get(field) for field in pyrofilegen.profile_fields] for profile in self.profiles]
+
+	def expected_delimited(self, rows, fields, delimiter):
+		stream = io.StringIO()
+		writer = csv.writer(stream, delimiter=delimiter, lineterminator="\n")
+		writer.writerow(fields)
+		for row in rows:
+			writer.writerow(["" if value is None else value for value in row])
+		return stream.getvalue().encode("utf-8")
+
+	def encode(self, profiles, format, fields=None):
+		stream = io.BytesIO()
+		count = encoders.write_profiles(profiles, stream, format=format, fields=fields)
+		self.assertEqual(count, len(profiles))
+		return stream.getvalue()
+
+	def test_delimited_matches_csv_writer(self):
+		for format, delimiter in encoders.delimiters.items():
+			for fields in [None, ["lat_long"], ["company", "first_name", "lat_long", "email"]]:
+				names = fields or pyrofilegen.profile_fields
+				rows = [[profile.get(field) for field in names] for profile in self.profiles]
+				expected = self.expected_delimited(rows, names, delimiter)
+				self.assertEqual(self.encode(self.profiles, format, fields), expected)
+				self.assertEqual(self.encode(self.lists(), format, fields), expected)
+
+	def test_short_list_profiles(self):
+		short = [values[:length] for values, length in zip(self.lists(), [3, 12, 28, 0, 15] * 10)]
+		padded = [values + [None] * (len(pyrofilegen.profile_fields) - len(values)) for values in short]
+		for format, delimiter in encoders.delimiters.items():
+			expected = self.expected_delimited(padded, pyrofilegen.profile_fields, delimiter)
+			self.assertEqual(self.encode(short, format), expected)
+		expected = "".join([pyrofilegen.format_profile(values) + "\n\n" for values in padded]).encode("utf-8")
+		self.assertEqual(self.encode(short, "text"), expected)
+
+	def test_text_matches_format_profile(self):
+		expected = "".join([pyrofilegen.format_profile(values) + "\n\n" for values in self.lists()]).encode("utf-8")
+		self.assertEqual(self.encode(self.profiles, "text"), expected)
+		self.assertEqual(self.encode(self.lists(), "text"), expected)
+
+	def test_text_layout_is_format_profile(self):
+		values = ["<%s>" % field for field in pyrofilegen.profile_fields]
+		text = pyrofilegen.format_profile(values)
+		self.assertEqual(text, "".join([label + "<%s>" % field for label, field in encoders.text_layout]))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_evolution.py
+#description     :Tests of the incremental population evolution.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import unittest
+
+from pyrofilegen import evolution, pyrofilegen
+
+class PopulationEvolverTest(unittest.TestCase):
+
+	def tearDown(self):
+		pyrofilegen.uninstall_assets()
+
+	def run_ticks(self, evolver, ticks):
+		records = []
+		for _ in range(ticks):
+			records.extend(evolver.step())
+		return records
+
+	def test_identity_matches_base_profile(self):
+		for variation in (False, True):
+			evolver = evolution.PopulationEvolver(20, seed=8, variation=variation)
+			for entity in range(20):
+				profile = evolver.profile(entity)
+				identity = evolver._identity(entity)
+				self.assertEqual(identity, dict((field, profile[field]) for field in identity))
+
+	def test_updates_match_current_profiles(self):
+		evolver = evolution.PopulationEvolver(200, seed=3, change_rate=0.05, signup_rate=0.01)
+		records = self.run_ticks(evolver, 20)
+		latest = {}
+		for record in records:
+			if record["op"] == "update":
+				self.assertEqual(set(record["values"]), set(evolution.change_groups[record["change"]]))
+				latest.setdefault(record["entity_id"], {}).update(record["values"])
+		self.assertTrue(latest)
+		for entity, values in latest.items():
+			if evolver.alive[entity]:
+				profile = evolver.profile(entity)
+				self.assertEqual(values, dict((field, profile[field]) for field in values))
+
+	def test_only_living_entities_change(self):
+		evolver = evolution.PopulationEvolver(100, seed=5, change_rate=0.2, change_weights={"delete": 3, "card": 1}, signup_rate=0.02)
+		deleted = set()
+		for record in self.run_ticks(evolver, 15):
+			self.assertNotIn(record["entity_id"], deleted)
+			if record["op"] == "delete":
+				deleted.add(record["entity_id"])
+		self.assertTrue(deleted)
+		living = [entity for entity in range(len(evolver)) if evolver.alive[entity]]
+		self.assertEqual(evolver.alive_count, len(living))
+		self.assertEqual(sorted(evolver._living), living)
+		self.assertEqual([record["entity_id"] for record in evolver.snapshot()], living)
+
+	def test_seeded(self):
+		first = self.run_ticks(evolution.PopulationEvolver(100, seed=9, change_rate=0.05), 5)
+		second = self.run_ticks(evolution.PopulationEvolver(100, seed=9, change_rate=0.05), 5)
+		self.assertEqual(first, second)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_ingest.py
+#description     :Tests of the OpenAddresses ingest.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrofilegen import ingest, shared_assets
+
+csv_rows = [
+	"LON,LAT,NUMBER,STREET,UNIT,CITY,DISTRICT,REGION,POSTCODE,ID,HASH",
+	"-79.3800000,43.6500000,10,KING ST W,,TORONTO,,ON,M5H 1A1,,",
+	"-79.3801000,43.6501000,10,King St W,,Toronto,,ON,m5h1a1,,",
+	"-79.3802000,43.6502000,12,king st w,,toronto,,,,,",
+	"-79.3900000,43.6600000,5,Queen St,,Toronto,,ON,M5V 2B2,,",
+	"-79.3901000,43.6601000,7,Queen St,,Toronto,,ON,,,",
+	"abc,43.6,1,Bad St,,Toronto,,ON,M5V 2B2,,",
+	"-140.0000000,60.0000000,1,Remote Rd,,Nowhere,,YT,,,",
+]
+features = [
+	{"type": "Feature", "properties": {"number": "1", "street": "Main St", "city": "Ottawa", "region": "ON", "postcode": "K1A 0B1"}, "geometry": {"type": "Point", "coordinates": [-75.7, 45.42]}},
+	{"type": "Feature", "properties": {"number": "2", "street": "Main St", "city": "Ottawa", "region": "ON", "postcode": None}, "geometry": {"type": "Point", "coordinates": [-75.7001, 45.4201]}},
+	{"type": "Feature", "properties": {"number": "3", "street": "Main St", "city": "Ottawa"}, "geometry": {"type": "Point", "coordinates": []}},
+]
+
+class IngestTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def path(self, name):
+		return os.path.join(self.directory, name)
+
+	def write(self, name, text):
+		with open(self.path(name), "w", encoding="utf-8") as f:
+			f.write(text)
+		return self.path(name)
+
+	def rows(self, name):
+		with open(self.path(name), "rb") as f:
+			tables = shared_assets.unpack_tables(f.read())
+		return sorted([list(row) for row in tables["canadian_data"]])
+
+	def test_csv_and_geojson(self):
+		paths = [self.write("on.csv", "\n".join(csv_rows) + "\n"), self.write("ottawa.geojson", "\n".join([json.dumps(feature) for feature in features]) + "\n")]
+		expected = None
+		for processes, shards in [(1, 1), (2, 4)]:
+			name = "out%s.pfa" % processes
+			stats = ingest.ingest_files(paths, self.path(name), processes=processes, chunk_size=64, shards=shards)
+			self.assertEqual(stats, {"read": 10, "invalid": 2, "duplicates": 1, "written": 6, "derived_postal_codes": 3, "dropped_no_postal_code": 1})
+			rows = self.rows(name)
+			self.assertEqual(expected or rows, rows)
+			expected = rows
+		self.assertIn(["43.6502000", "-79.3802000", "12", "King St W", "Toronto", "Ontario", "M5H 1A1"], expected)
+		self.assertIn(["43.6601000", "-79.3901000", "7", "Queen St", "Toronto", "Ontario", "M5V 2B2"], expected)
+		self.assertIn(["45.4201000", "-75.7001000", "2", "Main St", "Ottawa", "Ontario", "K1A 0B1"], expected)
+		self.assertEqual(sorted(name for name in os.listdir(self.directory) if name.endswith(".tmp")), [])
+
+	def test_feature_collection(self):
+		collection = {"type": "FeatureCollection", "features": features}
+		for name, text in [("one_line.geojson", json.dumps(collection)), ("pretty.geojson", json.dumps(collection, indent=2))]:
+			stats = ingest.ingest_files([self.write(name, text)], self.path(name + ".pfa"), processes=1)
+			self.assertEqual((stats["read"], stats["invalid"], stats["written"]), (3, 1, 2))
+
+	def test_not_a_feature_collection(self):
+		path = self.write("other.json", json.dumps({"type": "Topology", "objects": {}}, indent=2))
+		with self.assertRaises(ValueError):
+			ingest.ingest_files([path], self.path("other.pfa"), processes=1)
+		self.assertFalse(os.path.exists(self.path("other.pfa")))
+
+	def test_nearest_postal_code(self):
+		index = ingest.PostalCodeIndex()
+		index.add(["43.6500000", "-79.3800000", "1", "A St", "Toronto", "Ontario", "M5H 1A1"])
+		index.add(["43.6508000", "-79.3808000", "2", "A St", "Toronto", "Ontario", "M5H 2B2"])
+		index.add(["43.6509000", "-79.3809000", "4", "A St", "Toronto", "Ontario", "M5H 2B2"])
+		self.assertEqual(index.nearest(43.6501, -79.3801), "M5H 1A1")
+		self.assertEqual(index.nearest(43.6509, -79.3809), "M5H 2B2")
+		self.assertEqual(index.nearest(43.6599, -79.3799), "M5H 2B2")
+		self.assertEqual(index.nearest(50.0, -79.38), "")
+		self.assertEqual(index.city("toronto", "ontario"), "M5H 2B2")
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_jobs.py
+#description     :Tests of the checkpointed, resumable bulk generation jobs.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrofilegen import jobs, pyrofilegen
+
+class Interrupted(Exception):
+	pass
+
+class ResumeTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.stream_profiles = pyrofilegen.stream_profiles
+
+	def tearDown(self):
+		pyrofilegen.stream_profiles = self.stream_profiles
+		pyrofilegen.uninstall_assets()
+		shutil.rmtree(self.directory)
+
+	def path(self, name):
+		return os.path.join(self.directory, name)
+
+	def read(self, name):
+		with open(self.path(name), "rb") as f:
+			return f.read()
+
+	def interrupt_after(self, calls):
+		"""
+		Function to make generation fail after a number of chunks.
+
+		"""
+		state = {"calls": 0}
+		def stream_profiles(*args, **kwargs):
+			state["calls"] += 1
+			if state["calls"] > calls:
+				raise Interrupted()
+			return self.stream_profiles(*args, **kwargs)
+		pyrofilegen.stream_profiles = stream_profiles
+
+	def run_interrupted(self, name, calls, **kwargs):
+		self.interrupt_after(calls)
+		with self.assertRaises(Interrupted):
+			jobs.run_job(self.path(name), 200, seed=7, checkpoint_every=50, chunk_size=20, **kwargs)
+		pyrofilegen.stream_profiles = self.stream_profiles
+
+	def test_resumed_output_is_identical(self):
+		jobs.run_job(self.path("full.csv"), 200, seed=7, checkpoint_every=50, chunk_size=20)
+		self.run_interrupted("resumed.csv", 7)
+		checkpoint = jobs.read_checkpoint(jobs.checkpoint_path_for(self.path("resumed.csv")))
+		self.assertEqual(checkpoint["rows_written"], 100)
+		self.assertGreater(os.path.getsize(self.path("resumed.csv")), checkpoint["byte_offset"])
+		jobs.run_job(self.path("resumed.csv"), 200, seed=7, checkpoint_every=50, chunk_size=20, resume=True)
+		self.assertEqual(self.read("resumed.csv"), self.read("full.csv"))
+
+	def test_resumed_tsv_subset_is_identical(self):
+		fields = ["first_name", "last_name", "lat_long", "email"]
+		jobs.run_job(self.path("full.tsv"), 200, seed=7, format="tsv", fields=fields, checkpoint_every=50, chunk_size=20)
+		self.run_interrupted("resumed.tsv", 5, format="tsv", fields=fields)
+		jobs.run_job(self.path("resumed.tsv"), 200, seed=7, format="tsv", fields=fields, checkpoint_every=50, chunk_size=20, resume=True)
+		self.assertEqual(self.read("resumed.tsv"), self.read("full.tsv"))
+
+	def corrupt(self, name, position):
+		with open(self.path(name), "r+b") as f:
+			f.seek(position)
+			byte = f.read(1)
+			f.seek(position)
+			f.write(b"x" if byte != b"x" else b"y")
+
+	def test_last_interval_is_verified(self):
+		self.run_interrupted("out.csv", 7)
+		checkpoint = jobs.read_checkpoint(jobs.checkpoint_path_for(self.path("out.csv")))
+		self.corrupt("out.csv", checkpoint["byte_offset"] - 1)
+		with self.assertRaises(ValueError):
+			jobs.run_job(self.path("out.csv"), 200, seed=7, checkpoint_every=50, chunk_size=20, resume=True)
+
+	def test_full_verification_covers_earlier_intervals(self):
+		self.run_interrupted("out.csv", 7)
+		self.corrupt("out.csv", 0)
+		with self.assertRaises(ValueError):
+			jobs.run_job(self.path("out.csv"), 200, seed=7, checkpoint_every=50, chunk_size=20, resume=True, verify_full=True)
+
+	def test_installed_assets_are_kept(self):
+		pyrofilegen.install_assets(companies=["Acme Widgets"])
+		jobs.run_job(self.path("companies.csv"), 20, fields=["company"])
+		self.assertEqual(self.read("companies.csv"), b"company\n" + b"Acme Widgets\n" * 20)
+		self.assertIs(pyrofilegen.read_canadian_data(), pyrofilegen.read_canadian_data())
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_keyed.py
+#description     :Tests of the keyed deterministic profiles.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from pyrofilegen import pyrofilegen
+
+keys = ["customer-1", "customer-2", 12345, b"\x00raw"]
+
+class KeyedProfileTest(unittest.TestCase):
+
+	def tearDown(self):
+		pyrofilegen.reference_year = None
+		pyrofilegen._keyed_cache.clear()
+
+	def test_same_profile_in_another_process(self):
+		code = "import json, pyrofilegen; print(json.dumps([pyrofilegen.profile_for_key(key, 'secret') for key in %r]))" % (keys,)
+		env = dict(os.environ)
+		env["PYTHONPATH"] = os.pathsep.join([path for path in sys.path if path])
+		output = subprocess.check_output([sys.executable, "-c", code], env=env)
+		self.assertEqual(json.loads(output.decode("utf-8")), [pyrofilegen.profile_for_key(key, "secret") for key in keys])
+
+	def test_independent_of_the_current_year(self):
+		expected = [pyrofilegen.profile_for_key(key, "secret") for key in keys]
+		pyrofilegen._keyed_cache.clear()
+		pyrofilegen.reference_year = 2090
+		self.assertEqual([pyrofilegen.profile_for_key(key, "secret") for key in keys], expected)
+		self.assertEqual(list(pyrofilegen.profiles_for_keys(keys, "secret", batch_size=3)), expected)
+		later = pyrofilegen.profile_for_key(keys[0], "secret", year=pyrofilegen.keyed_reference_year + 10)
+		self.assertNotEqual(later["credit_card_expiry"], expected[0]["credit_card_expiry"])
+
+	def test_random_state_is_kept(self):
+		pyrofilegen.seed(1)
+		expected = pyrofilegen.generate_profile(format=3)
+		pyrofilegen.seed(1)
+		pyrofilegen.profile_for_key("customer-1", "secret")
+		list(pyrofilegen.profiles_for_keys(keys, "other secret"))
+		self.assertEqual(pyrofilegen.generate_profile(format=3), expected)
+
+	def test_secret_changes_profile(self):
+		self.assertNotEqual(pyrofilegen.profile_for_key("customer-1", "secret"), pyrofilegen.profile_for_key("customer-1", "other secret"))
+
+	def test_cache_follows_template_and_weight_changes(self):
+		saved = (list(pyrofilegen.email_templates.patterns), list(pyrofilegen.email_templates._compiled), list(pyrofilegen.email_templates._cumulative))
+		try:
+			before = pyrofilegen.profile_for_key("customer-1", "secret")
+			pyrofilegen.email_templates.register("{first}zzz{last}", weight=1000000)
+			after = pyrofilegen.profile_for_key("customer-1", "secret")
+			self.assertNotEqual(after["email"], before["email"])
+			self.assertIn("zzz", after["email"])
+		finally:
+			pyrofilegen.email_templates.patterns, pyrofilegen.email_templates._compiled, pyrofilegen.email_templates._cumulative = saved
+			pyrofilegen.email_templates.version += 1
+		self.assertEqual(pyrofilegen.profile_for_key("customer-1", "secret"), before)
+		weights = pyrofilegen.variation_weights["city"]
+		try:
+			varied = pyrofilegen.profile_for_key("customer-1", "secret", variation=True)
+			pyrofilegen.variations.set_weights("city", {"upper": 1})
+			self.assertEqual(pyrofilegen.profile_for_key("customer-1", "secret", variation=True)["city"], varied["city"].upper())
+		finally:
+			pyrofilegen.variations.set_weights("city", weights)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_permutation.py
+#description     :Tests of the seeded index hashing and permutations.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import unittest
+
+from pyrofilegen import permutation
+
+class IndexPermutationTest(unittest.TestCase):
+
+	def test_bijection(self):
+		for size in (1, 2, 3, 7, 64, 100, 1000, 4097):
+			for seed in (0, 1, 12345):
+				values = list(permutation.IndexPermutation(size, seed=seed))
+				self.assertEqual(sorted(values), list(range(size)), msg=(size, seed))
+
+	def test_seeded(self):
+		first = list(permutation.IndexPermutation(1000, seed=5))
+		self.assertEqual(first, list(permutation.IndexPermutation(1000, seed=5)))
+		self.assertNotEqual(first, list(permutation.IndexPermutation(1000, seed=6)))
+		self.assertNotEqual(first, list(range(1000)))
+
+	def test_index_range(self):
+		shuffled = permutation.IndexPermutation(10, seed=3)
+		self.assertEqual(shuffled[-1], shuffled[9])
+		with self.assertRaises(IndexError):
+			shuffled[10]
+		with self.assertRaises(ValueError):
+			permutation.IndexPermutation(0)
+
+	def test_hash_index(self):
+		self.assertEqual(permutation.hash_index(1, 2), permutation.hash_index(1, 2))
+		self.assertEqual(len(set(permutation.hash_index(9, index) for index in range(10000))), 10000)
+		self.assertTrue(0 <= permutation.hash_index(-1, -1) < 2 ** 64)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_sampling.py
+#description     :Tests of the without-replacement address sampling.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import unittest
+
+from pyrofilegen import pyrofilegen, sampling
+
+rows = [
+	["43.6500000", "-79.3800000", "10", "King St W", "Toronto", "Ontario", "M5H 1A1"],
+	["45.4200000", "-75.7000000", "3", "Main St", "Ottawa", "Ontario", "K1A 0B1"],
+	["49.2800000", "-123.1200000", "700", "Burrard St", "Vancouver", "British Columbia", "V6C 2A1"],
+]
+
+class AddressSamplerTest(unittest.TestCase):
+
+	def test_rows_used_once_per_pass(self):
+		table = [str(index) for index in range(101)]
+		sampler = sampling.AddressSampler(seed=11, rows=table)
+		first = [next(sampler) for _ in range(len(table))]
+		second = [next(sampler) for _ in range(len(table))]
+		self.assertEqual(sorted(first, key=int), table)
+		self.assertEqual(sorted(second, key=int), table)
+		self.assertNotEqual(first, second)
+
+	def test_workers_split_each_pass(self):
+		table = [str(index) for index in range(100)]
+		workers = [sampling.AddressSampler(seed=2, worker=worker, workers=7, rows=table) for worker in range(7)]
+		drawn = []
+		for draw in range(30):
+			drawn.extend(sampler.index_at(draw) for sampler in workers)
+		self.assertEqual(sorted(drawn[:100]), list(range(100)))
+		self.assertEqual(sorted(drawn[100:200]), list(range(100)))
+
+	def test_start_continues_a_run(self):
+		table = [str(index) for index in range(50)]
+		sampler = sampling.AddressSampler(seed=4, rows=table)
+		drawn = [next(sampler) for _ in range(80)]
+		resumed = sampling.AddressSampler(seed=4, rows=table, start=30)
+		self.assertEqual([next(resumed) for _ in range(50)], drawn[30:])
+		with self.assertRaises(ValueError):
+			sampling.AddressSampler(worker=2, workers=2, rows=table)
+
+	def test_address_generators_take_sampled_rows(self):
+		sampler = sampling.AddressSampler(seed=3, rows=rows)
+		for _ in range(len(rows)):
+			row = next(sampler)
+			self.assertEqual(pyrofilegen.generate_address_min(format=2, row=row), [row[2], row[3], row[6]])
+			self.assertEqual(pyrofilegen.generate_address_full(format=2, row=row), [row[2], row[3], row[4], row[5], row[6]])
+		self.assertEqual(pyrofilegen.generate_address_min(row=rows[1]), "3 Main St, K1A 0B1")
+
+if __name__ == "__main__":
+	unittest.main()
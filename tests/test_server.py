@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_server.py
+#description     :Smoke tests of the local HTTP profile service.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import json
+import threading
+import unittest
+
+try:
+	from urllib.error import HTTPError
+	from urllib.request import urlopen
+except ImportError:
+	urlopen = None
+
+from pyrofilegen import pyrofilegen
+
+@unittest.skipIf(urlopen is None, "pyrofilegen.server requires Python 3.7 or newer")
+class ServerTest(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		from pyrofilegen import server
+		cls.server = server.make_server(port=0, buffer_size=20)
+		cls.thread = threading.Thread(target=cls.server.serve_forever)
+		cls.thread.daemon = True
+		cls.thread.start()
+		cls.url = "http://%s:%s" % cls.server.server_address[:2]
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		cls.server.profile_buffer.stop()
+		cls.server.server_close()
+		cls.thread.join()
+		pyrofilegen.uninstall_assets()
+
+	def get(self, path):
+		response = urlopen(self.url + path, timeout=30)
+		try:
+			return response.status, response.headers, response.read()
+		finally:
+			response.close()
+
+	def test_profile(self):
+		status, headers, body = self.get("/profile")
+		self.assertEqual(status, 200)
+		self.assertEqual(sorted(json.loads(body.decode("utf-8"))), sorted(pyrofilegen.profile_fields))
+
+	def test_seeded_profiles(self):
+		path = "/profiles?n=5&fields=first_name,city&seed=42"
+		status, headers, body = self.get(path)
+		self.assertEqual(status, 200)
+		profiles = json.loads(body.decode("utf-8"))
+		self.assertEqual(len(profiles), 5)
+		self.assertEqual([sorted(profile) for profile in profiles], [["city", "first_name"]] * 5)
+		self.assertEqual(self.get(path)[2], body)
+		self.assertNotEqual(self.get("/profiles?n=5&fields=first_name,city&seed=43")[2], body)
+
+	def test_bad_field(self):
+		with self.assertRaises(HTTPError) as context:
+			self.get("/profiles?n=2&fields=first_name,shoe_size")
+		self.assertEqual(context.exception.code, 400)
+		context.exception.close()
+
+	def test_stream(self):
+		status, headers, body = self.get("/stream?n=150&fields=email")
+		self.assertEqual(status, 200)
+		self.assertEqual(headers["Content-Type"], "application/x-ndjson")
+		lines = body.decode("utf-8").splitlines()
+		self.assertEqual(len(lines), 150)
+		self.assertEqual([list(json.loads(line)) for line in lines], [["email"]] * 150)
+		self.assertEqual(self.get("/stream?n=7&seed=1")[2], self.get("/stream?n=7&seed=1")[2])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_shared_assets.py
+#description     :Tests of the shared memory asset store.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrofilegen import pyrofilegen, shared_assets
+
+def read_tables(_):
+	"""
+	Function to read the asset tables the generators use in a pool worker.
+
+	"""
+	return list(pyrofilegen.read_canadian_data()), pyrofilegen.read_area_codes(), list(pyrofilegen.read_companies())
+
+@unittest.skipIf(shared_assets.shared_memory is None, "shared memory requires Python 3.8 or newer")
+class SharedAssetsTest(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		pyrofilegen.uninstall_assets()
+		cls.expected = read_tables(None)
+
+	def tearDown(self):
+		pyrofilegen.uninstall_assets()
+
+	def check_pool(self, method):
+		if method not in multiprocessing.get_all_start_methods():
+			self.skipTest("%s start method is not available" % method)
+		context = multiprocessing.get_context(method)
+		with shared_assets.publish_assets() as assets:
+			pool = context.Pool(2, initializer=shared_assets.attach_assets, initargs=(assets.name,))
+			try:
+				results = pool.map(read_tables, range(2))
+			finally:
+				pool.close()
+				pool.join()
+		for canadian_data, area_codes, companies in results:
+			self.assertEqual(canadian_data, self.expected[0])
+			self.assertEqual(area_codes, self.expected[1])
+			self.assertEqual(companies, self.expected[2])
+
+	def test_spawn_pool(self):
+		self.check_pool("spawn")
+
+	def test_fork_pool(self):
+		self.check_pool("fork")
+
+	def test_asset_file(self):
+		directory = tempfile.mkdtemp()
+		try:
+			path = os.path.join(directory, "assets.bin")
+			shared_assets.write_asset_file(path)
+			tables = shared_assets.open_asset_file(path)
+			self.assertEqual(read_tables(None), self.expected)
+			self.assertEqual(tables["canadian_data"][-1], self.expected[0][-1])
+			with self.assertRaises(IndexError):
+				tables["companies"][len(self.expected[2])]
+		finally:
+			pyrofilegen.uninstall_assets()
+			shutil.rmtree(directory)
+
+	def test_table_file_writer(self):
+		directory = tempfile.mkdtemp()
+		try:
+			path = os.path.join(directory, "rows.bin")
+			writer = shared_assets.TableFileWriter(path, "canadian_data", 7)
+			for row in self.expected[0][:500]:
+				writer.write_row(row)
+			writer.close()
+			with open(path, "rb") as f:
+				tables = shared_assets.unpack_tables(f.read())
+			self.assertEqual(list(tables["canadian_data"]), self.expected[0][:500])
+		finally:
+			shutil.rmtree(directory)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_sinks.py
+#description     :Tests of the bulk database and file sinks.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from pyrofilegen import pyrofilegen, sinks
+
+class SinkTest(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		with pyrofilegen.seeded(3):
+			cls.profiles = list(pyrofilegen.stream_profiles(120, format=3))
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def path(self, name):
+		return os.path.join(self.directory, name)
+
+	def test_write_sqlite_row_counts(self):
+		for fast in [True, False]:
+			path = self.path("profiles_%s.db" % fast)
+			self.assertEqual(sinks.write_sqlite(self.profiles, path, batch_size=50, fast=fast), 120)
+			lists = [[profile[field] for field in pyrofilegen.profile_fields] for profile in self.profiles[:30]]
+			self.assertEqual(sinks.write_sqlite(lists, path, fields=["first_name", "city"], table_name="subset", fast=fast), 30)
+			connection = sqlite3.connect(path)
+			self.assertEqual(connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0], 120)
+			self.assertEqual(connection.execute("SELECT first_name, city FROM subset").fetchall(), [(profile["first_name"], profile["city"]) for profile in self.profiles[:30]])
+			connection.close()
+
+	def test_write_sqlite_restores_pragmas(self):
+		connection = sqlite3.connect(self.path("wal.db"))
+		connection.execute("PRAGMA journal_mode = WAL")
+		connection.execute("PRAGMA synchronous = NORMAL")
+		self.assertEqual(sinks.write_sqlite(self.profiles, connection, batch_size=50), 120)
+		self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+		self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+		self.assertFalse(connection.in_transaction)
+		connection.close()
+
+	def test_write_sqlite_keeps_caller_transaction(self):
+		connection = sqlite3.connect(self.path("caller.db"))
+		connection.execute("CREATE TABLE pending (value TEXT)")
+		connection.execute("PRAGMA synchronous = NORMAL")
+		connection.execute("INSERT INTO pending VALUES ('caller')")
+		self.assertTrue(connection.in_transaction)
+		self.assertEqual(sinks.write_sqlite(self.profiles, connection, batch_size=50), 120)
+		self.assertTrue(connection.in_transaction)
+		self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+		self.assertEqual(connection.execute("SELECT COUNT(*) FROM pending").fetchone()[0], 1)
+		connection.rollback()
+		self.assertEqual(connection.execute("SELECT COUNT(*) FROM pending").fetchone()[0], 0)
+		self.assertEqual(connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'profiles'").fetchone()[0], 0)
+		connection.close()
+
+	@unittest.skipIf(sinks.pyarrow is None, "pyarrow is not installed")
+	def test_write_parquet_row_groups(self):
+		path = self.path("profiles.parquet")
+		self.assertEqual(sinks.write_parquet(self.profiles, path, row_group_size=50, batch_size=20), 120)
+		parquet_file = sinks.pyarrow.parquet.ParquetFile(path)
+		self.assertEqual([parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)], [50, 50, 20])
+		table = parquet_file.read()
+		self.assertEqual(table.column("city").to_pylist(), [profile["city"] for profile in self.profiles])
+		self.assertEqual(table.column("email").to_pylist(), [profile["email"] for profile in self.profiles])
+
+	@unittest.skipIf(sinks.pyarrow is None, "pyarrow is not installed")
+	def test_write_arrow_ipc_round_trip(self):
+		path = self.path("profiles.arrow")
+		self.assertEqual(sinks.write_arrow_ipc(self.profiles, path, batch_size=40), 120)
+		table = sinks.pyarrow.ipc.open_file(path).read_all()
+		self.assertEqual(table.column("company").to_pylist(), [profile["company"] for profile in self.profiles])
+
+if __name__ == "__main__":
+	unittest.main()
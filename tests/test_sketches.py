@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_sketches.py
+#description     :Tests of the streaming profile sketches.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyrofilegen import sketches
+
+class SketchTest(unittest.TestCase):
+
+	def test_distinct_count(self):
+		first = sketches.HyperLogLog(12)
+		second = sketches.HyperLogLog(12)
+		for value in range(20000):
+			first.add(value)
+			second.add(value + 10000)
+		self.assertAlmostEqual(first.count(), 20000, delta=20000 * 0.05)
+		first.merge(second)
+		self.assertAlmostEqual(first.count(), 30000, delta=30000 * 0.05)
+		self.assertEqual(sketches.HyperLogLog.from_dict(first.to_dict()).count(), first.count())
+
+	def test_heavy_hitters(self):
+		first = sketches.HeavyHitters(k=3)
+		second = sketches.HeavyHitters(k=3)
+		for value in range(2000):
+			first.add("rare%s" % value)
+			second.add("rare%s" % (value + 2000))
+		first.add("a", 500)
+		first.add("b", 300)
+		second.add("b", 300)
+		second.add("c", 400)
+		first.merge(second)
+		self.assertEqual([value for value, count in first.top()], ["b", "a", "c"])
+		self.assertGreaterEqual(first.estimate("b"), 600)
+		self.assertEqual(first.total, 5500)
+
+	def test_merged_reports(self):
+		directory = tempfile.mkdtemp()
+		try:
+			paths = []
+			for worker in range(2):
+				sketch = sketches.ProfileSketch(precision=10)
+				for index in range(100):
+					sketch.update({"email": "user%s_%s@example.com" % (worker, index), "first_name": "Sam", "height": "5'%s" % (index % 12), "weight": "%s lbs" % (100 + index)})
+				paths.append(os.path.join(directory, "part%s.csv" % worker))
+				sketch.write_report(sketches.report_path_for(paths[-1]))
+			merged = sketches.merge_reports([sketches.report_path_for(path) for path in paths])
+			report = merged.report()
+			self.assertEqual(report["profiles"], 200)
+			self.assertAlmostEqual(report["distinct"]["email"]["estimate"], 200, delta=10)
+			self.assertEqual(report["top"]["first_name"], [["Sam", 200]])
+			self.assertEqual(report["top"]["email_domain"], [["example.com", 200]])
+			self.assertEqual(report["histograms"]["height"]["min"], 60)
+			self.assertEqual(report["histograms"]["weight"]["count"], 200)
+		finally:
+			shutil.rmtree(directory)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+#title           :test_variation.py
+#description     :Tests of the casing and abbreviation variation of field values.
+#author          :Tejinder Purba
+#version         :0.1
+#==============================================================================
+"""
+
+import unittest
+
+from pyrofilegen import pyrofilegen
+
+def casing(value):
+	"""
+	Function to classify the casing of a value as a variation style.
+
+	"""
+	if value.isupper():
+		return "upper"
+	if value.islower():
+		return "lower"
+	return "original"
+
+class VariationTest(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		pyrofilegen.load_assets()
+
+	@classmethod
+	def tearDownClass(cls):
+		pyrofilegen.uninstall_assets()
+
+	def test_first_name_casing_is_independent_of_gender(self):
+		counts = {}
+		with pyrofilegen.seeded(5):
+			for profile in pyrofilegen.stream_profiles(3000, format=3, variation=True):
+				styles = counts.setdefault(profile["gender"].lower(), {"original": 0, "upper": 0, "lower": 0})
+				styles[casing(profile["first_name"])] += 1
+		self.assertEqual(sorted(counts), ["female", "male"])
+		weights = pyrofilegen.variation_weights["first_name"]
+		for gender, styles in counts.items():
+			total = float(sum(styles.values()))
+			for style, weight in weights.items():
+				self.assertAlmostEqual(styles[style] / total, weight / 100.0, delta=0.06, msg="%s %s" % (gender, style))
+
+	def test_variant_matches_variants(self):
+		engine = pyrofilegen.VariationEngine()
+		for field, value in [("street_name", "main STREET west"), ("street_name", "OLD ROAD"), ("city", "Saint-Jean"), ("postal_code", "a1b 2c3")]:
+			variants = engine.variants(field, value)
+			for style in range(len(pyrofilegen.variation_styles)):
+				self.assertEqual(pyrofilegen.variations.variant(field, value, style), variants[style])
+
+	def test_only_asset_fields_are_cached(self):
+		engine = pyrofilegen.VariationEngine(pyrofilegen.variation_weights, pyrofilegen.variation_cached_fields)
+		engine.vary("first_name", "Anna")
+		engine.vary("postal_code", "A1B 2C3")
+		engine.vary("city", "Toronto")
+		self.assertEqual(sorted(engine._variants), ["city"])
+
+if __name__ == "__main__":
+	unittest.main()